@@ -0,0 +1,52 @@
+"""composite indexes for keyset pagination
+
+Revision ID: 20261019_0003
+Revises: 20260206_0002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0003"
+down_revision = "20260206_0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_course_credits_user_id_completed_at_id",
+        "course_credits",
+        ["user_id", "completed_at", "id"],
+    )
+    op.drop_index("ix_course_credits_user_id", table_name="course_credits")
+
+    op.create_index(
+        "ix_license_cycles_state_license_id_cycle_end_id",
+        "license_cycles",
+        ["state_license_id", "cycle_end", "id"],
+    )
+    op.drop_index("ix_license_cycles_state_license_id", table_name="license_cycles")
+
+    op.create_index(
+        "ix_certificates_course_credit_id_created_at_id",
+        "certificates",
+        ["course_credit_id", "created_at", "id"],
+    )
+    op.drop_index("ix_certificates_course_credit_id", table_name="certificates")
+
+
+def downgrade() -> None:
+    op.create_index("ix_certificates_course_credit_id", "certificates", ["course_credit_id"])
+    op.drop_index("ix_certificates_course_credit_id_created_at_id", table_name="certificates")
+
+    op.create_index("ix_license_cycles_state_license_id", "license_cycles", ["state_license_id"])
+    op.drop_index("ix_license_cycles_state_license_id_cycle_end_id", table_name="license_cycles")
+
+    op.create_index(
+        "ix_course_credits_user_id",
+        "course_credits",
+        ["user_id", "completed_at"],
+    )
+    op.drop_index("ix_course_credits_user_id_completed_at_id", table_name="course_credits")
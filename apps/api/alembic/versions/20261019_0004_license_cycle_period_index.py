@@ -0,0 +1,28 @@
+"""gist index on license cycle date ranges
+
+Revision ID: 20261019_0004
+Revises: 20261019_0003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0004"
+down_revision = "20261019_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_license_cycles_period",
+        "license_cycles",
+        [sa.text("daterange(cycle_start, cycle_end, '[]')")],
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_license_cycles_period", table_name="license_cycles")
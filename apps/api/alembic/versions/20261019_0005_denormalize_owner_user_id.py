@@ -0,0 +1,77 @@
+"""denormalize owning user_id onto child tables
+
+Revision ID: 20261019_0005
+Revises: 20261019_0004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0005"
+down_revision = "20261019_0004"
+branch_labels = None
+depends_on = None
+
+TABLES = ("license_cycles", "credit_allocations", "certificates")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True))
+
+    op.execute(
+        """
+        UPDATE license_cycles AS lc
+        SET user_id = sl.user_id
+        FROM state_licenses AS sl
+        WHERE lc.state_license_id = sl.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE credit_allocations AS ca
+        SET user_id = cc.user_id
+        FROM course_credits AS cc
+        WHERE ca.course_credit_id = cc.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE certificates AS c
+        SET user_id = cc.user_id
+        FROM course_credits AS cc
+        WHERE c.course_credit_id = cc.id
+        """
+    )
+
+    for table in TABLES:
+        op.alter_column(table, "user_id", nullable=False)
+        op.create_foreign_key(
+            f"fk_{table}_user_id_users",
+            table,
+            "users",
+            ["user_id"],
+            ["id"],
+        )
+
+    op.create_index(
+        "ix_license_cycles_user_id_cycle_end_id",
+        "license_cycles",
+        ["user_id", "cycle_end", "id"],
+    )
+    op.create_index(
+        "ix_credit_allocations_user_id_created_at_id",
+        "credit_allocations",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_credit_allocations_user_id_created_at_id", table_name="credit_allocations")
+    op.drop_index("ix_license_cycles_user_id_cycle_end_id", table_name="license_cycles")
+    for table in reversed(TABLES):
+        op.drop_constraint(f"fk_{table}_user_id_users", table, type_="foreignkey")
+        op.drop_column(table, "user_id")
@@ -0,0 +1,65 @@
+"""indexes for hot access paths
+
+Revision ID: 20261019_0006
+Revises: 20261019_0005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0006"
+down_revision = "20261019_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_credit_allocations_license_cycle_id",
+            "credit_allocations",
+            ["license_cycle_id"],
+            postgresql_include=["course_credit_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_certificates_user_id_created_at",
+            "certificates",
+            ["user_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded by ix_license_cycles_user_id_cycle_end_id; no query filters
+        # on cycle_end without an owner.
+        op.drop_index(
+            "ix_license_cycles_cycle_end",
+            table_name="license_cycles",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_license_cycles_cycle_end",
+            "license_cycles",
+            ["cycle_end"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_certificates_user_id_created_at",
+            table_name="certificates",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_credit_allocations_license_cycle_id",
+            table_name="credit_allocations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,37 @@
+"""add content-addressed certificate blobs
+
+Revision ID: 20261019_0008
+Revises: 20261019_0007
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0008"
+down_revision = "20261019_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "certificate_blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("blob_path", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("sha256", name="pk_certificate_blobs"),
+        sa.UniqueConstraint("blob_path", name="uq_certificate_blobs_blob_path"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("certificate_blobs")
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import re
+import uuid
+import zipfile
+from collections import deque
+from collections.abc import Generator, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+from ce_api.storage import (
+    CERT_STREAM_CHUNK_SIZE,
+    get_local_certificate_path,
+    is_local_storage,
+    open_certificate_stream,
+)
+
+AUDIT_PREFETCH = 3
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = (
+    "course_title",
+    "provider",
+    "completed_at",
+    "hours",
+    "certificate",
+    "size_bytes",
+    "sha256",
+    "status",
+)
+
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9._ -]+")
+
+
+@dataclass(frozen=True)
+class AuditPacketRow:
+    course_id: uuid.UUID
+    course_title: str
+    provider: Optional[str]
+    completed_at: date
+    hours: Decimal
+    certificate_filename: Optional[str] = None
+    blob_path: Optional[str] = None
+    size_bytes: Optional[int] = None
+    content_sha256: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable sink that hands ``zipfile`` output back to the generator."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def _safe_name(value: str) -> str:
+    return _UNSAFE_NAME_CHARS.sub("_", value).strip(" .") or "certificate"
+
+
+def _entry_names(rows: Sequence[AuditPacketRow]) -> list[Optional[str]]:
+    names: list[Optional[str]] = []
+    seen: set[str] = set()
+    for row in rows:
+        if row.blob_path is None:
+            names.append(None)
+            continue
+        filename = Path(row.certificate_filename or "certificate")
+        stem = f"{row.completed_at.isoformat()}_{_safe_name(row.course_title)}_{_safe_name(filename.stem)}"
+        suffix = f".{_safe_name(filename.suffix[1:])}" if filename.suffix else ""
+        name = f"certificates/{stem}{suffix}"
+        for counter in itertools.count(2):
+            if name not in seen:
+                break
+            name = f"certificates/{stem}-{counter}{suffix}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _iter_local_file(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        while True:
+            chunk = handle.read(CERT_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _OpenedBlob:
+    """S3 body whose first chunk has been read; ``close`` releases the connection."""
+
+    def __init__(self, first: bytes, rest: Generator[bytes, None, None]) -> None:
+        self._first = first
+        self._rest = rest
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._first
+        yield from self._rest
+
+    def close(self) -> None:
+        self._rest.close()
+
+
+def _open_blob(blob_path: str) -> Optional[Iterable[bytes]]:
+    """Start reading a blob; S3 objects have their first chunk fetched already.
+
+    The result has a ``close`` method, which must be called even if the blob
+    is never read.
+    """
+    try:
+        if is_local_storage():
+            return _iter_local_file(get_local_certificate_path(blob_path))
+        chunks, _ = open_certificate_stream(blob_path)
+        return _OpenedBlob(next(chunks, b""), chunks)
+    except FileNotFoundError:
+        return None
+
+
+def _close_opened(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None and future.result() is not None:
+        future.result().close()
+
+
+def _prefetched(
+    pool: ThreadPoolExecutor,
+    blob_paths: Iterable[str],
+) -> Generator[Optional[Iterable[bytes]], None, None]:
+    """Yield opened blobs in order while the next few are opened in the background.
+
+    Blobs still queued when the generator is closed early (the client went
+    away mid-download) are closed as soon as they finish opening.
+    """
+    pending: deque[Future] = deque()
+    remaining = iter(blob_paths)
+    for blob_path in itertools.islice(remaining, AUDIT_PREFETCH):
+        pending.append(pool.submit(_open_blob, blob_path))
+    try:
+        while pending:
+            future = pending.popleft()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append(pool.submit(_open_blob, next_path))
+            yield future.result()
+    finally:
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(_close_opened)
+
+
+def _manifest(rows: Sequence[AuditPacketRow], names: Sequence[Optional[str]], missing: set[int]) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(MANIFEST_FIELDS)
+    previous_course_id = None
+    for index, (row, name) in enumerate(zip(rows, names)):
+        # Hours belong to the course, not the certificate; repeating them on
+        # every certificate row would overstate the total when summed.
+        hours = "" if row.course_id == previous_course_id else str(row.hours)
+        previous_course_id = row.course_id
+        if name is None:
+            status = "no certificate"
+        elif index in missing:
+            status = "missing"
+        else:
+            status = "included"
+        writer.writerow(
+            [
+                row.course_title,
+                row.provider or "",
+                row.completed_at.isoformat(),
+                hours,
+                name or "",
+                "" if row.size_bytes is None else row.size_bytes,
+                row.content_sha256 or "",
+                status,
+            ]
+        )
+    return output.getvalue()
+
+
+def _zip_time(value: Optional[datetime]) -> tuple[int, int, int, int, int, int]:
+    value = value or datetime(1980, 1, 1)
+    return (max(value.year, 1980), value.month, value.day, value.hour, value.minute, value.second)
+
+
+def iter_audit_packet(rows: Sequence[AuditPacketRow]) -> Iterator[bytes]:
+    """Build the audit ZIP on the fly, yielding bytes as entries are written.
+
+    Certificates are stored uncompressed (they are PDFs and photos already)
+    and copied chunk by chunk, so memory stays flat however large the packet
+    gets. The manifest goes last so it can flag blobs missing from storage.
+    Rows must be grouped by course, as the manifest lists each course's hours
+    only on its first row.
+    """
+    names = _entry_names(rows)
+    with_blobs = [index for index, name in enumerate(names) if name is not None]
+    missing: set[int] = set()
+    sink = _ZipSink()
+
+    with ThreadPoolExecutor(max_workers=AUDIT_PREFETCH) as pool:
+        with zipfile.ZipFile(sink, mode="w") as archive:
+            blobs = _prefetched(pool, (rows[index].blob_path for index in with_blobs))
+            try:
+                for index, chunks in zip(with_blobs, blobs):
+                    if chunks is None:
+                        missing.add(index)
+                        continue
+                    info = zipfile.ZipInfo(names[index], date_time=_zip_time(rows[index].created_at))
+                    info.compress_type = zipfile.ZIP_STORED
+                    try:
+                        with archive.open(info, mode="w") as entry:
+                            for chunk in chunks:
+                                entry.write(chunk)
+                                yield from sink.drain()
+                    finally:
+                        chunks.close()
+                    yield from sink.drain()
+            finally:
+                blobs.close()
+
+            archive.writestr(
+                MANIFEST_NAME,
+                _manifest(rows, names, missing),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+        yield from sink.drain()
+
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+from datetime import date
+from typing import Any
+
+from sqlalchemy import any_, bindparam, delete, func, literal, not_, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
+from sqlalchemy.orm import Session
+
+from ce_api.models import CourseCredit, CreditAllocation, LicenseCycle
+from ce_api.models.license_cycle import cycle_period
+
+ALLOCATION_COLUMNS = ["id", "user_id", "course_credit_id", "license_cycle_id"]
+
+
+def _cycle_covers(day: Any):
+    return cycle_period().op("@>")(day)
+
+
+def allocate_courses_to_covering_cycles(
+    session: Session,
+    user_id: uuid.UUID,
+    course_ids: Sequence[uuid.UUID],
+) -> list[tuple[uuid.UUID, uuid.UUID]]:
+    """Allocate each course to every owned cycle covering its completion date.
+
+    Runs as a single ``INSERT ... SELECT`` and returns the created
+    ``(course_id, cycle_id)`` pairs. Existing allocations are left untouched.
+    """
+    if not course_ids:
+        return []
+
+    eligible = (
+        select(func.gen_random_uuid(), CourseCredit.user_id, CourseCredit.id, LicenseCycle.id)
+        .select_from(CourseCredit)
+        .join(LicenseCycle, _cycle_covers(CourseCredit.completed_at))
+        .where(
+            CourseCredit.user_id == user_id,
+            LicenseCycle.user_id == user_id,
+            CourseCredit.id
+            == any_(bindparam("course_ids", list(course_ids), type_=ARRAY(UUID(as_uuid=True)))),
+        )
+    )
+    stmt = (
+        insert(CreditAllocation)
+        .from_select(ALLOCATION_COLUMNS, eligible)
+        .on_conflict_do_nothing(index_elements=["course_credit_id", "license_cycle_id"])
+        .returning(CreditAllocation.course_credit_id, CreditAllocation.license_cycle_id)
+    )
+    return [(row.course_credit_id, row.license_cycle_id) for row in session.execute(stmt)]
+
+
+def reallocate_course_for_new_date(
+    session: Session,
+    user_id: uuid.UUID,
+    course_id: uuid.UUID,
+    old_date: date,
+    new_date: date,
+) -> tuple[list[uuid.UUID], list[uuid.UUID]]:
+    """Move a course's date-based allocations from ``old_date`` to ``new_date``.
+
+    Allocations to cycles that covered the old date but not the new one are
+    removed, and owned cycles covering the new date are added, all in one
+    statement. Allocations to cycles that never covered the old date were
+    made by hand and are kept. Returns ``(added_cycle_ids, removed_cycle_ids)``.
+    """
+    removed = (
+        delete(CreditAllocation)
+        .where(
+            CreditAllocation.course_credit_id == course_id,
+            CreditAllocation.license_cycle_id == LicenseCycle.id,
+            _cycle_covers(old_date),
+            not_(_cycle_covers(new_date)),
+        )
+        .returning(CreditAllocation.license_cycle_id)
+        .cte("removed")
+    )
+    added = (
+        insert(CreditAllocation)
+        .from_select(
+            ALLOCATION_COLUMNS,
+            select(
+                func.gen_random_uuid(),
+                LicenseCycle.user_id,
+                literal(course_id, UUID(as_uuid=True)),
+                LicenseCycle.id,
+            ).where(LicenseCycle.user_id == user_id, _cycle_covers(new_date)),
+        )
+        .on_conflict_do_nothing(index_elements=["course_credit_id", "license_cycle_id"])
+        .returning(CreditAllocation.license_cycle_id)
+        .cte("added")
+    )
+    stmt = select(literal("added").label("change"), added.c.license_cycle_id).union_all(
+        select(literal("removed").label("change"), removed.c.license_cycle_id)
+    )
+
+    added_ids: list[uuid.UUID] = []
+    removed_ids: list[uuid.UUID] = []
+    for change, cycle_id in session.execute(stmt):
+        (added_ids if change == "added" else removed_ids).append(cycle_id)
+    return added_ids, removed_ids
+
+
+def allocate_covered_courses_to_cycle(
+    session: Session,
+    user_id: uuid.UUID,
+    cycle: LicenseCycle,
+) -> tuple[int, int]:
+    """Attach every owned course completed inside ``cycle`` to it.
+
+    One ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` statement; returns
+    ``(created, already_allocated)`` counts.
+    """
+    eligible = (
+        select(CourseCredit.id, CourseCredit.user_id)
+        .where(
+            CourseCredit.user_id == user_id,
+            CourseCredit.completed_at >= cycle.cycle_start,
+            CourseCredit.completed_at <= cycle.cycle_end,
+        )
+        .cte("eligible")
+    )
+    inserted = (
+        insert(CreditAllocation)
+        .from_select(
+            ALLOCATION_COLUMNS,
+            select(
+                func.gen_random_uuid(),
+                eligible.c.user_id,
+                eligible.c.id,
+                literal(cycle.id, UUID(as_uuid=True)),
+            ),
+        )
+        .on_conflict_do_nothing(index_elements=["course_credit_id", "license_cycle_id"])
+        .returning(CreditAllocation.id)
+        .cte("inserted")
+    )
+    stmt = select(
+        select(func.count()).select_from(eligible).scalar_subquery(),
+        select(func.count()).select_from(inserted).scalar_subquery(),
+    )
+    eligible_count, created = session.execute(stmt).one()
+    return created, eligible_count - created
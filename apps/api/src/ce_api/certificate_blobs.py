@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Sequence
+
+from fastapi import UploadFile
+from sqlalchemy import delete, literal_column, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ce_api.models import CertificateBlob
+from ce_api.storage import (
+    content_blob_path,
+    delete_certificate_blob,
+    hash_certificate_upload,
+    promote_certificate_blob,
+    write_certificate_upload,
+)
+
+
+def acquire_certificate_blob(
+    session: Session,
+    content_sha256: str,
+    size_bytes: int,
+) -> tuple[str, bool]:
+    """Take a reference on the blob for ``content_sha256``.
+
+    Returns ``(blob_path, created)``. ``created`` is true when no blob with
+    this content existed yet, in which case the caller must write it before
+    committing. The upsert locks the row until commit, so a concurrent
+    release of the last reference cannot remove the blob underneath us.
+    """
+    stmt = (
+        insert(CertificateBlob)
+        .values(
+            sha256=content_sha256,
+            blob_path=content_blob_path(content_sha256),
+            size_bytes=size_bytes,
+            ref_count=1,
+        )
+        .on_conflict_do_update(
+            index_elements=[CertificateBlob.sha256],
+            set_={"ref_count": CertificateBlob.ref_count + 1},
+        )
+        .returning(CertificateBlob.blob_path, literal_column("xmax = 0").label("created"))
+    )
+    row = session.execute(stmt).one()
+    return row.blob_path, row.created
+
+
+def release_certificate_blobs(session: Session, blob_paths: Sequence[str]) -> list[str]:
+    """Drop one reference per entry; returns the paths nothing references any more.
+
+    Paths without a ``certificate_blobs`` row predate content addressing and
+    belong to a single certificate, so they are always unreferenced. Stored
+    files and cached previews are left in place: deleting them before the
+    caller commits would lose data if the commit failed. ``reconcile_storage``
+    removes them once they are unreferenced and old enough.
+    """
+    unreferenced = []
+    for blob_path, count in Counter(blob_paths).items():
+        remaining = session.scalar(
+            update(CertificateBlob)
+            .where(CertificateBlob.blob_path == blob_path)
+            .values(ref_count=CertificateBlob.ref_count - count)
+            .returning(CertificateBlob.ref_count)
+        )
+        if remaining is not None and remaining > 0:
+            continue
+        if remaining is not None:
+            session.execute(delete(CertificateBlob).where(CertificateBlob.blob_path == blob_path))
+        unreferenced.append(blob_path)
+    return unreferenced
+
+
+def store_certificate_upload(session: Session, file: UploadFile) -> tuple[str, int, str]:
+    """Store a spooled upload by content; returns ``(blob_path, size, sha256 hex)``.
+
+    Content that is already stored is not written again.
+    """
+    size_bytes, content_sha256 = hash_certificate_upload(file)
+    blob_path, created = acquire_certificate_blob(session, content_sha256, size_bytes)
+    if created:
+        write_certificate_upload(file, blob_path)
+    else:
+        file.file.close()
+    return blob_path, size_bytes, content_sha256
+
+
+def adopt_staged_certificate(
+    session: Session,
+    staged_path: str,
+    content_sha256: str,
+    size_bytes: int,
+) -> str:
+    """Move a staged upload to its content address, or drop it if a copy exists."""
+    try:
+        blob_path, created = acquire_certificate_blob(session, content_sha256, size_bytes)
+        if created:
+            promote_certificate_blob(staged_path, blob_path)
+            return blob_path
+    except BaseException:
+        delete_certificate_blob(staged_path)
+        raise
+    delete_certificate_blob(staged_path)
+    return blob_path
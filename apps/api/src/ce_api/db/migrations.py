@@ -0,0 +1,87 @@
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import ProgrammingError
+
+# Keep in step with the newest file in alembic/versions; a test compares the two.
+SCHEMA_HEAD_REVISION = "20261019_0008"
+# Arbitrary application-wide key for pg_try_advisory_lock.
+MIGRATION_LOCK_KEY = 0x63655F6D6967
+MIGRATION_LOCK_TIMEOUT_SECONDS = 900.0
+MIGRATION_LOCK_POLL_SECONDS = 1.0
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_database_revision(connection: Connection) -> Optional[str]:
+    """Return the revision stamped in ``alembic_version``, or ``None`` if there is none."""
+    try:
+        with connection.begin_nested():
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except ProgrammingError:
+        return None
+
+
+def _upgrade_to_head(config_path: str) -> None:
+    # Alembic is only imported when the schema is actually behind.
+    from alembic import command as alembic_command
+    from alembic.config import Config as AlembicConfig
+
+    alembic_command.upgrade(AlembicConfig(config_path), "head")
+
+
+def _acquire_migration_lock(connection: Connection, timeout: float, poll_interval: float) -> None:
+    """Poll for the advisory lock, ending the transaction after every attempt.
+
+    A blocking ``pg_advisory_lock`` would leave waiters inside an open
+    transaction. ``CREATE INDEX CONCURRENTLY`` in the winner's upgrade waits
+    for every older snapshot, so it would wait on the waiters while they wait
+    on it, across sessions where Postgres cannot see the deadlock.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        ).scalar()
+        connection.commit()
+        if acquired:
+            return
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Timed out after {timeout:g}s waiting for the migration lock")
+        time.sleep(poll_interval)
+
+
+def migrate_to_head(
+    engine: Engine,
+    config_path: str,
+    lock_timeout: float = MIGRATION_LOCK_TIMEOUT_SECONDS,
+    poll_interval: float = MIGRATION_LOCK_POLL_SECONDS,
+) -> bool:
+    """Bring the schema to ``SCHEMA_HEAD_REVISION``; returns whether Alembic ran.
+
+    The common case is one query that finds the database already current.
+    Otherwise the upgrade runs under a session-level advisory lock, so when
+    several instances boot together one migrates and the rest poll, re-check
+    and skip.
+    """
+    with engine.connect() as connection:
+        if get_database_revision(connection) == SCHEMA_HEAD_REVISION:
+            return False
+        connection.rollback()
+
+        _acquire_migration_lock(connection, lock_timeout, poll_interval)
+        try:
+            revision = get_database_revision(connection)
+            # End the transaction so it holds no table locks while Alembic works.
+            connection.commit()
+            if revision == SCHEMA_HEAD_REVISION:
+                return False
+            LOGGER.info("Migrating schema from %s to %s", revision, SCHEMA_HEAD_REVISION)
+            _upgrade_to_head(config_path)
+            return True
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
@@ -6,6 +6,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from ce_api.request_timing import TimedQueuePool, instrument_engine
+
 _ENGINE: Optional[Engine] = None
 _SESSIONMAKER: Optional[sessionmaker[Session]] = None
 
@@ -16,7 +18,8 @@ def get_engine() -> Engine:
         database_url = os.getenv("DATABASE_URL")
         if not database_url:
             raise RuntimeError("DATABASE_URL is not set")
-        _ENGINE = create_engine(database_url, pool_pre_ping=True)
+        _ENGINE = create_engine(database_url, pool_pre_ping=True, poolclass=TimedQueuePool)
+        instrument_engine(_ENGINE)
     return _ENGINE
 
 
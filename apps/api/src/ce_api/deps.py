@@ -3,8 +3,6 @@ import json
 import time
 from typing import Any, Optional
 
-import httpx
-import jwt
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
@@ -12,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from ce_api.db.session import get_db_session
 from ce_api.models import User
+from ce_api.request_timing import timed
 
 _JWKS_CACHE: dict[str, Any] = {}
 _JWKS_TTL_SECONDS = 3600
@@ -60,6 +59,8 @@ def _get_jwks(region: str, user_pool_id: str) -> list[dict[str, Any]]:
     if cached and cached.get("expires_at", 0) > now:
         return cached["keys"]
 
+    import httpx
+
     issuer = _cognito_issuer(region, user_pool_id)
     jwks_url = f"{issuer}/.well-known/jwks.json"
     try:
@@ -83,6 +84,20 @@ def _get_jwks(region: str, user_pool_id: str) -> list[dict[str, Any]]:
     return keys
 
 
+def prefetch_jwks() -> Optional[int]:
+    """Fetch and cache the Cognito keyset ahead of the first request.
+
+    Returns the number of keys, or ``None`` when Cognito is not configured.
+    """
+    if not _is_cognito_enabled():
+        return None
+    import jwt
+
+    # Loads the RSA backend from cryptography, which token checks need.
+    jwt.get_algorithm_by_name("RS256")
+    return len(_get_jwks(_get_cognito_region(), _get_cognito_user_pool_id()))
+
+
 def _find_jwk(keys: list[dict[str, Any]], kid: str) -> Optional[dict[str, Any]]:
     for key in keys:
         if key.get("kid") == kid:
@@ -91,6 +106,8 @@ def _find_jwk(keys: list[dict[str, Any]], kid: str) -> Optional[dict[str, Any]]:
 
 
 def _decode_cognito_claims(request: Request) -> dict[str, Any]:
+    import jwt
+
     region = _get_cognito_region()
     user_pool_id = _get_cognito_user_pool_id()
     client_id = _get_cognito_client_id()
@@ -159,10 +176,19 @@ def _get_email(request: Request) -> Optional[str]:
     return request.headers.get("X-MS-CLIENT-PRINCIPAL-NAME") or os.getenv("DEV_EMAIL")
 
 
+def find_user_by_external_id(session: Session, external_user_id: str) -> Optional[User]:
+    return session.scalar(select(User).where(User.external_user_id == external_user_id))
+
+
 def get_current_user(
     request: Request,
     session: Session = Depends(get_db_session),
 ) -> User:
+    with timed("auth"):
+        return _resolve_current_user(request, session)
+
+
+def _resolve_current_user(request: Request, session: Session) -> User:
     email: Optional[str] = None
     display_name: Optional[str] = None
 
@@ -186,7 +212,7 @@ def get_current_user(
     if not external_user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-    user = session.scalar(select(User).where(User.external_user_id == external_user_id))
+    user = find_user_by_external_id(session, external_user_id)
     if user:
         return user
 
@@ -196,7 +222,7 @@ def get_current_user(
         session.commit()
     except IntegrityError:
         session.rollback()
-        user = session.scalar(select(User).where(User.external_user_id == external_user_id))
+        user = find_user_by_external_id(session, external_user_id)
         if user:
             return user
         raise
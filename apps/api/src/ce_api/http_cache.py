@@ -0,0 +1,11 @@
+def etag_matches(header: str, etag: str) -> bool:
+    """Return whether an ``If-None-Match`` header value matches ``etag``."""
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -1,21 +1,24 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
 import os
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
-from fastapi.responses import FileResponse
-from alembic import command as alembic_command
-from alembic.config import Config as AlembicConfig
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, Response, status
 
+from ce_api.db.migrations import migrate_to_head
+from ce_api.db.session import get_engine
 from ce_api.deps import get_current_user
+from ce_api.request_timing import ServerTimingMiddleware, TimedRoute, is_server_timing_enabled
 from ce_api.routers import cycles_router, state_licenses_router, timeline_router
 from ce_api.routers.allocations import router as allocations_router
 from ce_api.routers.certificates import router as certificates_router
 from ce_api.routers.courses import router as courses_router
 from ce_api.routers.progress import router as progress_router
-from ce_api.schemas import UserMe
+from ce_api.schemas import ReadinessOut, UserMe
+from ce_api.static_files import INDEX_FILE, build_static_manifest, static_response
 from ce_api.storage import ensure_cert_storage_dir
+from ce_api.warmup import Warmup
 
 STATIC_DIR = Path(os.getenv("STATIC_DIR", Path(__file__).resolve().parents[2] / "static"))
 LOGGER = logging.getLogger(__name__)
@@ -30,21 +33,27 @@ def _run_migrations_on_startup() -> None:
         return
 
     config_path = os.getenv("ALEMBIC_CONFIG", "alembic.ini")
-    LOGGER.info("Running startup migrations with config '%s'", config_path)
-
-    alembic_cfg = AlembicConfig(config_path)
-    alembic_command.upgrade(alembic_cfg, "head")
+    if migrate_to_head(get_engine(), config_path):
+        LOGGER.info("Ran startup migrations with config '%s'", config_path)
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI):
+async def lifespan(app: FastAPI):
     _run_migrations_on_startup()
     ensure_cert_storage_dir()
+    app.state.static_assets = build_static_manifest(STATIC_DIR)
+    # Warm up in the background: /healthz answers at once, /readyz once this succeeds.
+    app.state.warmup = Warmup()
+    warmup_task = asyncio.create_task(asyncio.to_thread(app.state.warmup.run))
     yield
+    app.state.warmup.stop()
+    await warmup_task
 
 
 app = FastAPI(lifespan=lifespan)
-api_router = APIRouter(prefix="/api")
+if is_server_timing_enabled():
+    app.add_middleware(ServerTimingMiddleware)
+api_router = APIRouter(prefix="/api", route_class=TimedRoute)
 
 
 @app.get("/healthz")
@@ -52,6 +61,14 @@ def healthz() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/readyz", response_model=ReadinessOut)
+def readyz(request: Request, response: Response) -> ReadinessOut:
+    report = request.app.state.warmup.report()
+    if report.status != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
+
 @api_router.get("/me", response_model=UserMe)
 def me(current_user=Depends(get_current_user)) -> UserMe:
     return UserMe.model_validate(current_user)
@@ -72,15 +89,13 @@ def auth_passthrough(path: str):
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
 
-if STATIC_DIR.exists() and (STATIC_DIR / "index.html").exists():
-    @app.get("/{path:path}", include_in_schema=False)
-    def spa_fallback(path: str):
-        if path.startswith("api") or path.startswith(".auth"):
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-
-        if path:
-            candidate = (STATIC_DIR / path).resolve()
-            if candidate.is_relative_to(STATIC_DIR) and candidate.is_file():
-                return FileResponse(candidate)
+@app.get("/{path:path}", include_in_schema=False)
+def spa_fallback(path: str, request: Request):
+    if path.startswith("api") or path.startswith(".auth"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-        return FileResponse(STATIC_DIR / "index.html")
+    assets = request.app.state.static_assets
+    asset = assets.get(path) or assets.get(INDEX_FILE)
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return static_response(request, asset)
@@ -1,4 +1,5 @@
 from ce_api.models.certificate import Certificate
+from ce_api.models.certificate_blob import CertificateBlob
 from ce_api.models.course_credit import CourseCredit
 from ce_api.models.credit_allocation import CreditAllocation
 from ce_api.models.license_cycle import LicenseCycle
@@ -7,6 +8,7 @@ from ce_api.models.user import User
 
 __all__ = [
     "Certificate",
+    "CertificateBlob",
     "CourseCredit",
     "CreditAllocation",
     "LicenseCycle",
@@ -12,10 +12,12 @@ from ce_api.db.base import Base
 class Certificate(Base):
     __tablename__ = "certificates"
     __table_args__ = (
-        Index(None, "course_credit_id"),
+        Index("ix_certificates_course_credit_id_created_at_id", "course_credit_id", "created_at", "id"),
+        Index("ix_certificates_user_id_created_at", "user_id", "created_at"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     course_credit_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("course_credits.id"), nullable=False
     )
@@ -23,6 +25,7 @@ class Certificate(Base):
     content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     blob_path: Mapped[str] = mapped_column(String, nullable=False)
+    content_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
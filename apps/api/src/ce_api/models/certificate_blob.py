@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ce_api.db.base import Base
+
+
+class CertificateBlob(Base):
+    __tablename__ = "certificate_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    blob_path: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -12,7 +12,7 @@ from ce_api.db.base import Base
 class CourseCredit(Base):
     __tablename__ = "course_credits"
     __table_args__ = (
-        Index(None, "user_id", "completed_at"),
+        Index("ix_course_credits_user_id_completed_at_id", "user_id", "completed_at", "id"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy import DateTime, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -12,9 +12,16 @@ class CreditAllocation(Base):
     __tablename__ = "credit_allocations"
     __table_args__ = (
         UniqueConstraint("course_credit_id", "license_cycle_id"),
+        Index("ix_credit_allocations_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_credit_allocations_license_cycle_id",
+            "license_cycle_id",
+            postgresql_include=["course_credit_id"],
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     course_credit_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("course_credits.id"), nullable=False
     )
@@ -1,21 +1,25 @@
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, func
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, func, literal_column, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ce_api.db.base import Base
 
+CYCLE_PERIOD_SQL = "daterange(cycle_start, cycle_end, '[]')"
+
 
 class LicenseCycle(Base):
     __tablename__ = "license_cycles"
     __table_args__ = (
-        Index(None, "state_license_id"),
-        Index(None, "cycle_end"),
+        Index("ix_license_cycles_state_license_id_cycle_end_id", "state_license_id", "cycle_end", "id"),
+        Index("ix_license_cycles_user_id_cycle_end_id", "user_id", "cycle_end", "id"),
+        Index("ix_license_cycles_period", text(CYCLE_PERIOD_SQL), postgresql_using="gist"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     state_license_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("state_licenses.id"), nullable=False
     )
@@ -28,3 +32,13 @@ class LicenseCycle(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
     )
+
+
+def cycle_period():
+    """Inclusive ``daterange`` of a cycle; matches the GiST index expression."""
+    return func.daterange(LicenseCycle.cycle_start, LicenseCycle.cycle_end, literal_column("'[]'"))
+
+
+def date_period(start, end):
+    """Inclusive ``daterange`` for a query window; ``None`` leaves that side open."""
+    return func.daterange(start, end, literal_column("'[]'"))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import base64
+import json
+from collections.abc import Callable, Sequence
+from typing import Any, Optional, TypeVar
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_LIMIT = 500
+
+T = TypeVar("T")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([str(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[str], Any]]) -> tuple[Any, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(raw_values, list) or len(raw_values) != len(parsers):
+            raise ValueError("cursor shape mismatch")
+        return tuple(parse(value) for parse, value in zip(parsers, raw_values))
+    except (ValueError, TypeError, UnicodeDecodeError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from error
+
+
+def apply_keyset(
+    stmt: Select,
+    columns: Sequence[Any],
+    parsers: Sequence[Callable[[str], Any]],
+    cursor: Optional[str],
+    limit: Optional[int],
+    descending: bool = False,
+) -> Select:
+    """Order ``stmt`` by ``columns`` and, when ``limit`` is set, seek past ``cursor``.
+
+    Without a limit the statement keeps returning the full ordered result set.
+    One extra row is fetched so :func:`finish_page` can tell whether more exist.
+    """
+    if descending:
+        stmt = stmt.order_by(*(column.desc() for column in columns))
+    else:
+        stmt = stmt.order_by(*(column.asc() for column in columns))
+
+    if limit is None:
+        return stmt
+
+    if cursor:
+        values = decode_cursor(cursor, parsers)
+        key = tuple_(*columns)
+        stmt = stmt.where(key < tuple_(*values) if descending else key > tuple_(*values))
+    return stmt.limit(limit + 1)
+
+
+def finish_page(
+    items: Sequence[T],
+    limit: Optional[int],
+    key: Callable[[T], Sequence[Any]],
+    response: Response,
+) -> list[T]:
+    items = list(items)
+    if limit is None or len(items) <= limit:
+        return items
+
+    page = items[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(page[-1]))
+    return page
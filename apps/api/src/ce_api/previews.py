@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import BinaryIO
+
+from ce_api.models import Certificate
+from ce_api.storage import (
+    get_local_certificate_path,
+    is_local_storage,
+    load_certificate_bytes,
+    preview_blob_path,
+    write_certificate_bytes,
+)
+
+PREVIEW_MAX_EDGE = 480
+PREVIEW_QUALITY = 80
+PREVIEW_CONTENT_TYPE = "image/webp"
+
+
+class PreviewUnavailableError(Exception):
+    """Raised when a certificate cannot be rendered as an image preview."""
+
+
+def is_previewable(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.lower().startswith("image/")
+
+
+def preview_name(content_sha256: str) -> str:
+    return f"{content_sha256}-{PREVIEW_MAX_EDGE}.webp"
+
+
+def preview_content_sha256(name: str) -> str:
+    """Recover the content hash from a name built by ``preview_name``."""
+    return name.split("-", 1)[0]
+
+
+def certificate_preview_path(content_sha256: str) -> str:
+    return preview_blob_path(preview_name(content_sha256))
+
+
+def render_preview(source: Path | BinaryIO, max_edge: int = PREVIEW_MAX_EDGE) -> bytes:
+    """Downscale an image to fit ``max_edge`` and encode it as WebP."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source) as image:
+            # Lets the JPEG decoder scale by 1/2..1/8 while decoding.
+            image.draft("RGB", (max_edge, max_edge))
+            preview = ImageOps.exif_transpose(image)
+            preview.thumbnail((max_edge, max_edge))
+            if preview.mode not in {"RGB", "RGBA"}:
+                preview = preview.convert("RGBA" if "transparency" in preview.info else "RGB")
+            output = io.BytesIO()
+            preview.save(output, format="WEBP", quality=PREVIEW_QUALITY)
+            return output.getvalue()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+        raise PreviewUnavailableError(str(error)) from error
+
+
+def load_certificate_preview(certificate: Certificate) -> bytes:
+    """Return the cached preview for ``certificate``, rendering it on first use.
+
+    Renditions are keyed by content hash, so certificates sharing a blob
+    share a preview. Certificates stored before hashing are rendered on
+    every request.
+    """
+    if not is_previewable(certificate.content_type):
+        raise PreviewUnavailableError(certificate.content_type or "unknown content type")
+
+    cached_path = None
+    if certificate.content_sha256:
+        cached_path = certificate_preview_path(certificate.content_sha256)
+        try:
+            return load_certificate_bytes(cached_path)
+        except FileNotFoundError:
+            pass
+
+    if is_local_storage():
+        preview = render_preview(get_local_certificate_path(certificate.blob_path))
+    else:
+        preview = render_preview(io.BytesIO(load_certificate_bytes(certificate.blob_path)))
+
+    if cached_path:
+        write_certificate_bytes(cached_path, preview, PREVIEW_CONTENT_TYPE)
+    return preview
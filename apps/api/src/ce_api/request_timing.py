@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LOGGER = logging.getLogger(__name__)
+SERVER_TIMING_HEADER = b"server-timing"
+QUERY_COUNT_HEADER = b"x-db-query-count"
+QUERY_TIME_HEADER = b"x-db-time-ms"
+# Order of the entries in the header and the log line.
+PHASES = ("auth", "pool", "sql", "handler", "serialize")
+# Set on endpoint wrappers; include_router rebuilds routes from the wrapped endpoint.
+TIMED_ENDPOINT_ATTR = "_request_timed"
+
+
+class RequestTimings:
+    """Milliseconds spent per phase, and SQL statements issued, while handling one request."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.sql_count = 0
+        self.handler_done: Optional[float] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds * 1000
+
+    def header_value(self, total_ms: float) -> str:
+        entries = [f"{phase};dur={self.phases[phase]:.1f}" for phase in PHASES if phase in self.phases]
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+_CURRENT: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def is_server_timing_enabled() -> bool:
+    return os.getenv("SERVER_TIMING_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to ``phase``; free when no request is being timed."""
+    timings = _CURRENT.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+@contextmanager
+def timed_statement() -> Iterator[None]:
+    """Count and time one statement that bypasses the engine's cursor events.
+
+    For work on the raw DBAPI cursor, such as ``COPY``. A streamed ``COPY``
+    is charged for as long as the block feeds it rows.
+    """
+    timings = _CURRENT.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add("sql", time.perf_counter() - started)
+        timings.sql_count += 1
+
+
+class TimedQueuePool(QueuePool):
+    """Queue pool that charges checkout waits, including pre-ping, to ``pool``."""
+
+    def connect(self):
+        with timed("pool"):
+            return super().connect()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _CURRENT.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    timings = _CURRENT.get()
+    started = conn.info.get("query_started")
+    if timings is not None and started:
+        timings.add("sql", time.perf_counter() - started.pop())
+        timings.sql_count += 1
+
+
+def _handle_error(context) -> None:
+    started = context.connection.info.get("query_started") if context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a route function so its own run time is charged to ``handler``."""
+
+    def _finish(timings: Optional[RequestTimings], started: float) -> None:
+        if timings is not None:
+            timings.handler_done = time.perf_counter()
+            timings.add("handler", timings.handler_done - started)
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def _async_endpoint(*args, **kwargs):
+            timings, started = _CURRENT.get(), time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _finish(timings, started)
+
+        setattr(_async_endpoint, TIMED_ENDPOINT_ATTR, True)
+        return _async_endpoint
+
+    @functools.wraps(endpoint)
+    def _endpoint(*args, **kwargs):
+        timings, started = _CURRENT.get(), time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _finish(timings, started)
+
+    setattr(_endpoint, TIMED_ENDPOINT_ATTR, True)
+    return _endpoint
+
+
+class TimedRoute(APIRoute):
+    """Route that splits its time into ``handler`` and ``serialize``.
+
+    Serialization is whatever happens between the route function returning
+    and the response object being ready: response-model validation and JSON
+    encoding.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if not (
+            getattr(endpoint, TIMED_ENDPOINT_ATTR, False)
+            or inspect.isgeneratorfunction(endpoint)
+            or inspect.isasyncgenfunction(endpoint)
+        ):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def _timed_handler(request):
+            response = await handler(request)
+            timings = _CURRENT.get()
+            if timings is not None and timings.handler_done is not None:
+                timings.add("serialize", time.perf_counter() - timings.handler_done)
+            return response
+
+        return _timed_handler
+
+
+class ServerTimingMiddleware:
+    """Time each HTTP request, add ``Server-Timing`` and query-count headers and log them as JSON."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _CURRENT.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def _send(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((SERVER_TIMING_HEADER, timings.header_value(total_ms).encode()))
+                headers.append((QUERY_COUNT_HEADER, str(timings.sql_count).encode()))
+                headers.append((QUERY_TIME_HEADER, f"{timings.phases.get('sql', 0.0):.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _CURRENT.reset(token)
+            route = scope.get("route")
+            LOGGER.info(
+                json.dumps(
+                    {
+                        "event": "request_timing",
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": getattr(route, "name", None),
+                        "status": status_code,
+                        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+                        "sql_count": timings.sql_count,
+                        **{f"{phase}_ms": round(ms, 1) for phase, ms in timings.phases.items()},
+                    }
+                )
+            )
@@ -1,18 +1,93 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import any_, bindparam, func, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
 from sqlalchemy.orm import Session
 
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
-from ce_api.models import CreditAllocation, CourseCredit, LicenseCycle, StateLicense, User
-from ce_api.schemas import AllocationBulkCreate, AllocationBulkResult, AllocationOut
+from ce_api.models import CreditAllocation, CourseCredit, LicenseCycle, User
+from ce_api.pagination import MAX_PAGE_LIMIT, apply_keyset, finish_page
+from ce_api.request_timing import TimedRoute
+from ce_api.schemas import AllocationBulkCreate, AllocationBulkResult, AllocationOut, AllocationPair
+
+router = APIRouter(prefix="/allocations", tags=["allocations"], route_class=TimedRoute)
+
+
+def _insert_allocation_matrix(
+    session: Session,
+    user_id: uuid.UUID,
+    course_ids: List[uuid.UUID],
+    cycle_ids: List[uuid.UUID],
+):
+    """Insert every course x cycle pair in one statement.
+
+    Nothing is inserted unless all requested courses and cycles are owned by
+    the user. Returns the owned course and cycle counts and the created rows.
+    """
+    uuid_array = ARRAY(UUID(as_uuid=True))
+    owned_courses = (
+        select(CourseCredit.id)
+        .where(
+            CourseCredit.id == any_(bindparam("course_ids", course_ids, type_=uuid_array)),
+            CourseCredit.user_id == user_id,
+        )
+        .cte("owned_courses")
+    )
+    owned_cycles = (
+        select(LicenseCycle.id)
+        .where(
+            LicenseCycle.id == any_(bindparam("cycle_ids", cycle_ids, type_=uuid_array)),
+            LicenseCycle.user_id == user_id,
+        )
+        .cte("owned_cycles")
+    )
+    course_count = select(func.count()).select_from(owned_courses).scalar_subquery()
+    cycle_count = select(func.count()).select_from(owned_cycles).scalar_subquery()
+
+    inserted = (
+        insert(CreditAllocation)
+        .from_select(
+            ["id", "user_id", "course_credit_id", "license_cycle_id"],
+            select(
+                func.gen_random_uuid(),
+                literal(user_id, UUID(as_uuid=True)),
+                owned_courses.c.id,
+                owned_cycles.c.id,
+            )
+            .select_from(owned_courses.join(owned_cycles, true()))
+            .where(course_count == len(course_ids), cycle_count == len(cycle_ids)),
+        )
+        .on_conflict_do_nothing(index_elements=["course_credit_id", "license_cycle_id"])
+        .returning(
+            CreditAllocation.id,
+            CreditAllocation.course_credit_id,
+            CreditAllocation.license_cycle_id,
+            CreditAllocation.created_at,
+        )
+        .cte("inserted")
+    )
+    guard = select(literal(1).label("one")).subquery("guard")
+    rows = session.execute(
+        select(
+            course_count.label("course_count"),
+            cycle_count.label("cycle_count"),
+            inserted.c.id,
+            inserted.c.course_credit_id,
+            inserted.c.license_cycle_id,
+            inserted.c.created_at,
+        ).select_from(guard.outerjoin(inserted, true()))
+    ).all()
 
-router = APIRouter(prefix="/allocations", tags=["allocations"])
+    owned_course_count = rows[0].course_count
+    owned_cycle_count = rows[0].cycle_count
+    created = [row for row in rows if row.id is not None]
+    return owned_course_count, owned_cycle_count, created
 
 
 @router.post("/bulk", response_model=AllocationBulkResult, status_code=status.HTTP_201_CREATED)
@@ -21,79 +96,64 @@ def bulk_create_allocations(
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> AllocationBulkResult:
-    course = session.scalar(
-        select(CourseCredit).where(
-            CourseCredit.id == payload.course_id,
-            CourseCredit.user_id == current_user.id,
-        )
-    )
-    if not course:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-
+    course_ids = payload.all_course_ids()
     cycle_ids = list(dict.fromkeys(payload.cycle_ids))
-    if not cycle_ids:
-        return AllocationBulkResult(created=[], skipped_cycle_ids=[])
 
-    cycles = session.scalars(
-        select(LicenseCycle)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(
-            StateLicense.user_id == current_user.id,
-            LicenseCycle.id.in_(cycle_ids),
-        )
-    ).all()
-    if len(cycles) != len(cycle_ids):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-
-    existing_cycle_ids = set(
-        session.scalars(
-            select(CreditAllocation.license_cycle_id).where(
-                CreditAllocation.course_credit_id == course.id,
-                CreditAllocation.license_cycle_id.in_(cycle_ids),
-            )
-        ).all()
+    owned_course_count, owned_cycle_count, created = _insert_allocation_matrix(
+        session, current_user.id, course_ids, cycle_ids
     )
-
-    created: List[AllocationOut] = []
-    skipped: List[uuid.UUID] = []
-
-    for cycle_id in cycle_ids:
-        if cycle_id in existing_cycle_ids:
-            skipped.append(cycle_id)
-            continue
-        allocation = CreditAllocation(course_credit_id=course.id, license_cycle_id=cycle_id)
-        session.add(allocation)
-        created.append(allocation)
+    if owned_course_count != len(course_ids) or owned_cycle_count != len(cycle_ids):
+        session.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
     session.commit()
 
-    created_out = [AllocationOut.model_validate(item) for item in created]
-    return AllocationBulkResult(created=created_out, skipped_cycle_ids=skipped)
+    created_pairs = {(row.course_credit_id, row.license_cycle_id) for row in created}
+    skipped = [
+        AllocationPair(course_credit_id=course_id, license_cycle_id=cycle_id)
+        for course_id in course_ids
+        for cycle_id in cycle_ids
+        if (course_id, cycle_id) not in created_pairs
+    ]
+    skipped_cycle_ids = list(dict.fromkeys(pair.license_cycle_id for pair in skipped))
+
+    created_out = [AllocationOut.model_validate(row) for row in created]
+    return AllocationBulkResult(
+        created=created_out,
+        skipped_cycle_ids=skipped_cycle_ids,
+        skipped=skipped,
+    )
 
 
 @router.get("", response_model=List[AllocationOut])
 def list_allocations(
+    response: Response,
     course_id: Optional[uuid.UUID] = Query(default=None),
     cycle_id: Optional[uuid.UUID] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(default=None),
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> List[AllocationOut]:
-    stmt = (
-        select(CreditAllocation)
-        .join(CourseCredit, CreditAllocation.course_credit_id == CourseCredit.id)
-        .join(LicenseCycle, CreditAllocation.license_cycle_id == LicenseCycle.id)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(
-            CourseCredit.user_id == current_user.id,
-            StateLicense.user_id == current_user.id,
-        )
-    )
+    stmt = select(CreditAllocation).where(CreditAllocation.user_id == current_user.id)
     if course_id:
         stmt = stmt.where(CreditAllocation.course_credit_id == course_id)
     if cycle_id:
         stmt = stmt.where(CreditAllocation.license_cycle_id == cycle_id)
 
-    allocations = session.scalars(stmt).all()
+    stmt = apply_keyset(
+        stmt,
+        [CreditAllocation.created_at, CreditAllocation.id],
+        [datetime.fromisoformat, uuid.UUID],
+        cursor,
+        limit,
+    )
+    allocations = finish_page(
+        session.scalars(stmt).all(),
+        limit,
+        lambda item: (item.created_at, item.id),
+        response,
+    )
     return [AllocationOut.model_validate(item) for item in allocations]
 
 
@@ -104,14 +164,9 @@ def delete_allocation(
     current_user: User = Depends(get_current_user),
 ) -> None:
     allocation = session.scalar(
-        select(CreditAllocation)
-        .join(CourseCredit, CreditAllocation.course_credit_id == CourseCredit.id)
-        .join(LicenseCycle, CreditAllocation.license_cycle_id == LicenseCycle.id)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(
+        select(CreditAllocation).where(
             CreditAllocation.id == allocation_id,
-            CourseCredit.user_id == current_user.id,
-            StateLicense.user_id == current_user.id,
+            CreditAllocation.user_id == current_user.id,
         )
     )
     if not allocation:
@@ -2,16 +2,35 @@ from __future__ import annotations
 
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ce_api.certificate_blobs import release_certificate_blobs
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
-from ce_api.models import Certificate, CourseCredit, User
-from ce_api.storage import delete_certificate_blob, load_certificate_bytes
+from ce_api.http_cache import etag_matches
+from ce_api.models import Certificate, User
+from ce_api.previews import (
+    PREVIEW_CONTENT_TYPE,
+    PREVIEW_MAX_EDGE,
+    PreviewUnavailableError,
+    is_previewable,
+    load_certificate_preview,
+)
+from ce_api.request_timing import TimedRoute
+from ce_api.storage import (
+    create_certificate_download_url,
+    get_cert_download_mode,
+    get_local_certificate_path,
+    is_local_storage,
+    open_certificate_stream,
+)
 
-router = APIRouter(prefix="/certificates", tags=["certificates"])
+router = APIRouter(prefix="/certificates", tags=["certificates"], route_class=TimedRoute)
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
 
 
 def _get_certificate_for_user(
@@ -20,18 +39,52 @@ def _get_certificate_for_user(
     current_user: User,
 ) -> Certificate | None:
     return session.scalar(
-        select(Certificate)
-        .join(CourseCredit, Certificate.course_credit_id == CourseCredit.id)
-        .where(
+        select(Certificate).where(
             Certificate.id == certificate_id,
-            CourseCredit.user_id == current_user.id,
+            Certificate.user_id == current_user.id,
         )
     )
 
 
+def _parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into an inclusive ``(start, end)`` pair.
+
+    Returns ``None`` for headers that should be ignored (other units,
+    multiple ranges, malformed values) so the full body is served instead.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, separator, end_text = spec.strip().partition("-")
+    if not separator or not (start_text or end_text):
+        return None
+    if (start_text and not start_text.isdigit()) or (end_text and not end_text.isdigit()):
+        return None
+
+    if not start_text:
+        # A zero-length suffix ("bytes=-0") selects nothing and is unsatisfiable.
+        suffix_length = int(end_text)
+        start = max(size - suffix_length, 0) if suffix_length else size
+        end = size - 1
+    else:
+        start = int(start_text)
+        end = int(end_text) if end_text else max(start, size - 1)
+        if end < start:
+            return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
 @router.get("/{certificate_id}/download")
 def download_certificate(
     certificate_id: uuid.UUID,
+    request: Request,
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -39,8 +92,48 @@ def download_certificate(
     if not certificate:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
+    media_type = certificate.content_type or "application/octet-stream"
+    safe_filename = certificate.filename.replace('"', "")
+    headers = {"Content-Disposition": f'attachment; filename="{safe_filename}"'}
+
+    etag = f'"{certificate.content_sha256}"' if certificate.content_sha256 else None
+    if etag:
+        cache_headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        headers.update(cache_headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if (
+        range_header
+        and certificate.size_bytes is not None
+        and not is_local_storage()
+        and (if_range is None or if_range == etag)
+    ):
+        byte_range = _parse_byte_range(range_header, certificate.size_bytes)
+
     try:
-        file_content = load_certificate_bytes(certificate.blob_path)
+        if is_local_storage():
+            # FileResponse answers Range and If-Range against the ETag set above.
+            path = get_local_certificate_path(certificate.blob_path)
+            return FileResponse(path, media_type=media_type, headers=headers)
+
+        if get_cert_download_mode() == "redirect":
+            url = create_certificate_download_url(
+                certificate.blob_path, media_type, headers["Content-Disposition"]
+            )
+            return RedirectResponse(
+                url,
+                status_code=status.HTTP_302_FOUND,
+                headers={"Cache-Control": "private, no-store"},
+            )
+
+        chunks, content_length = open_certificate_stream(
+            certificate.blob_path, byte_range=byte_range
+        )
     except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
     except Exception as error:
@@ -49,12 +142,65 @@ def download_certificate(
             detail="File storage unavailable",
         ) from error
 
-    safe_filename = certificate.filename.replace('"', "")
-    return Response(
-        content=file_content,
-        media_type=certificate.content_type or "application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{safe_filename}"'},
-    )
+    headers["Accept-Ranges"] = "bytes"
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{certificate.size_bytes}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            chunks,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    if certificate.size_bytes is not None:
+        content_length = certificate.size_bytes
+    if content_length is not None:
+        headers["Content-Length"] = str(content_length)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+@router.get("/{certificate_id}/preview")
+def preview_certificate(
+    certificate_id: uuid.UUID,
+    request: Request,
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    certificate = _get_certificate_for_user(certificate_id, session, current_user)
+    if not certificate:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not is_previewable(certificate.content_type):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Preview not available",
+        )
+
+    headers = {"Cache-Control": "private, no-cache"}
+    if certificate.content_sha256:
+        etag = f'"{certificate.content_sha256}-{PREVIEW_MAX_EDGE}"'
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        preview = load_certificate_preview(certificate)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    except PreviewUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Preview not available",
+        )
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="File storage unavailable",
+        ) from error
+
+    return Response(content=preview, media_type=PREVIEW_CONTENT_TYPE, headers=headers)
 
 
 @router.delete("/{certificate_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -67,8 +213,6 @@ def delete_certificate(
     if not certificate:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    blob_path = certificate.blob_path
     session.delete(certificate)
+    release_certificate_blobs(session, [certificate.blob_path])
     session.commit()
-
-    delete_certificate_blob(blob_path)
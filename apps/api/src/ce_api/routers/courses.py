@@ -1,29 +1,65 @@
 from __future__ import annotations
 
+import csv
+import io
+import json
 import uuid
-from datetime import date
-from decimal import Decimal
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
-
+from starlette.requests import ClientDisconnect
+
+from ce_api.auto_allocation import allocate_courses_to_covering_cycles, reallocate_course_for_new_date
+from ce_api.certificate_blobs import (
+    adopt_staged_certificate,
+    release_certificate_blobs,
+    store_certificate_upload,
+)
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
-from ce_api.models import Certificate, CourseCredit, CreditAllocation, LicenseCycle, StateLicense, User
-from ce_api.schemas import CertificateOut, CourseCreate, CourseOut, CourseUpdate
-from ce_api.storage import delete_certificate_blob, save_certificate_upload
-
-router = APIRouter(prefix="/courses", tags=["courses"])
-
-
-def _validate_hours(hours: Decimal) -> None:
-    if hours <= Decimal("0"):
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-            detail="hours must be greater than 0",
-        )
+from ce_api.models import Certificate, CourseCredit, CreditAllocation, LicenseCycle, User
+from ce_api.models.license_cycle import cycle_period
+from ce_api.pagination import MAX_PAGE_LIMIT, apply_keyset, finish_page
+from ce_api.request_timing import TimedRoute, timed_statement
+from ce_api.schemas import (
+    CertificateOut,
+    CertificateUploadComplete,
+    CertificateUploadUrlCreate,
+    CertificateUploadUrlOut,
+    CourseCreate,
+    CourseImportResult,
+    CourseImportRow,
+    CourseOut,
+    CourseUpdate,
+    LicenseCycleOut,
+)
+from ce_api.storage import (
+    CertificateTooLargeError,
+    CertificateUploadError,
+    create_certificate_upload_post,
+    delete_certificate_blob,
+    get_cert_max_upload_bytes,
+    get_certificate_upload_scope,
+    head_certificate_object,
+    is_local_storage,
+    object_content_sha256,
+    stream_certificate_upload,
+)
+
+router = APIRouter(prefix="/courses", tags=["courses"], route_class=TimedRoute)
+
+MAX_IMPORT_ROWS = 10_000
+IMPORT_FIELDS = ("title", "provider", "completed_at", "hours")
+IMPORT_COPY_SQL = (
+    "COPY course_credits (id, user_id, title, provider, completed_at, hours) FROM STDIN"
+)
 
 
 @router.post("", response_model=CourseOut, status_code=status.HTTP_201_CREATED)
@@ -32,8 +68,6 @@ def create_course(
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> CourseOut:
-    _validate_hours(payload.hours)
-
     course = CourseCredit(
         user_id=current_user.id,
         title=payload.title,
@@ -44,30 +78,143 @@ def create_course(
     session.add(course)
     session.flush()
 
-    cycle_ids = session.scalars(
-        select(LicenseCycle.id)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(
-            StateLicense.user_id == current_user.id,
-            LicenseCycle.cycle_start <= payload.completed_at,
-            LicenseCycle.cycle_end >= payload.completed_at,
+    allocate_courses_to_covering_cycles(session, current_user.id, [course.id])
+
+    session.commit()
+    session.refresh(course)
+    return CourseOut.model_validate(course)
+
+
+def _open_import_records(file: UploadFile) -> Iterator[Any]:
+    filename = (file.filename or "").lower()
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+
+    if content_type in {"text/csv", "application/csv"} or filename.endswith(".csv"):
+        reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+        return (
+            {
+                key: value.strip()
+                for key in IMPORT_FIELDS
+                if (value := record.get(key)) and value.strip()
+            }
+            for record in reader
         )
-    ).all()
 
-    for cycle_id in cycle_ids:
-        session.add(
-            CreditAllocation(course_credit_id=course.id, license_cycle_id=cycle_id)
+    if content_type == "application/json" or filename.endswith(".json"):
+        try:
+            records = json.load(file.file)
+        except ValueError as error:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Import file is not valid JSON",
+            ) from error
+        if not isinstance(records, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="JSON import must be an array of courses",
+            )
+        return iter(records)
+
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Import file must be CSV or JSON",
+    )
+
+
+def _validate_import_record(record: Any) -> CourseCreate:
+    if not isinstance(record, dict):
+        raise ValueError("row must be an object")
+    return CourseCreate.model_validate(record)
+
+
+def _describe_import_error(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+            for item in error.errors()
         )
+    return str(error)
+
 
+@router.post("/import", response_model=CourseImportResult, status_code=status.HTTP_201_CREATED)
+def import_courses(
+    file: UploadFile = File(...),
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+) -> CourseImportResult:
+    records = _open_import_records(file)
+    rows: List[CourseImportRow] = []
+    course_ids: List[uuid.UUID] = []
+
+    cursor = session.connection().connection.cursor()
+    try:
+        # COPY runs on the raw cursor, outside the engine events that count statements.
+        with timed_statement(), cursor.copy(IMPORT_COPY_SQL) as copy:
+            for row_number, record in enumerate(records, start=1):
+                if row_number > MAX_IMPORT_ROWS:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail=f"Import is limited to {MAX_IMPORT_ROWS} rows",
+                    )
+                try:
+                    payload = _validate_import_record(record)
+                except ValueError as error:
+                    rows.append(
+                        CourseImportRow(
+                            row=row_number,
+                            status="error",
+                            error=_describe_import_error(error),
+                        )
+                    )
+                    continue
+
+                course_id = uuid.uuid4()
+                copy.write_row(
+                    (
+                        course_id,
+                        current_user.id,
+                        payload.title,
+                        payload.provider,
+                        payload.completed_at,
+                        payload.hours,
+                    )
+                )
+                course_ids.append(course_id)
+                rows.append(CourseImportRow(row=row_number, status="created", course_id=course_id))
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Import file could not be parsed",
+        ) from error
+    finally:
+        cursor.close()
+        file.file.close()
+
+    allocated = allocate_courses_to_covering_cycles(session, current_user.id, course_ids)
     session.commit()
-    session.refresh(course)
-    return CourseOut.model_validate(course)
+
+    cycles_by_course: Dict[uuid.UUID, List[uuid.UUID]] = defaultdict(list)
+    for course_id, cycle_id in allocated:
+        cycles_by_course[course_id].append(cycle_id)
+    for row in rows:
+        if row.course_id:
+            row.allocated_cycle_ids = sorted(cycles_by_course.get(row.course_id, []))
+
+    return CourseImportResult(
+        created_count=len(course_ids),
+        error_count=len(rows) - len(course_ids),
+        allocation_count=len(allocated),
+        rows=rows,
+    )
 
 
 @router.get("", response_model=List[CourseOut])
 def list_courses(
+    response: Response,
     from_date: Optional[date] = Query(default=None, alias="from"),
     to_date: Optional[date] = Query(default=None, alias="to"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(default=None),
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> List[CourseOut]:
@@ -78,8 +225,20 @@ def list_courses(
     if to_date:
         stmt = stmt.where(CourseCredit.completed_at <= to_date)
 
-    stmt = stmt.order_by(CourseCredit.completed_at.desc())
-    courses = session.scalars(stmt).all()
+    stmt = apply_keyset(
+        stmt,
+        [CourseCredit.completed_at, CourseCredit.id],
+        [date.fromisoformat, uuid.UUID],
+        cursor,
+        limit,
+        descending=True,
+    )
+    courses = finish_page(
+        session.scalars(stmt).all(),
+        limit,
+        lambda course: (course.completed_at, course.id),
+        response,
+    )
     return [CourseOut.model_validate(course) for course in courses]
 
 
@@ -100,6 +259,32 @@ def get_course(
     return CourseOut.model_validate(course)
 
 
+@router.get("/{course_id}/eligible-cycles", response_model=List[LicenseCycleOut])
+def list_eligible_cycles(
+    course_id: uuid.UUID,
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+) -> List[LicenseCycleOut]:
+    course = session.scalar(
+        select(CourseCredit).where(
+            CourseCredit.id == course_id,
+            CourseCredit.user_id == current_user.id,
+        )
+    )
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    cycles = session.scalars(
+        select(LicenseCycle)
+        .where(
+            LicenseCycle.user_id == current_user.id,
+            cycle_period().op("@>")(course.completed_at),
+        )
+        .order_by(LicenseCycle.cycle_end.asc(), LicenseCycle.id.asc())
+    ).all()
+    return [LicenseCycleOut.model_validate(cycle) for cycle in cycles]
+
+
 @router.patch("/{course_id}", response_model=CourseOut)
 def update_course(
     course_id: uuid.UUID,
@@ -131,6 +316,14 @@ def update_course(
                 status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
                 detail="completed_at cannot be null",
             )
+        if payload.completed_at != course.completed_at:
+            reallocate_course_for_new_date(
+                session,
+                current_user.id,
+                course.id,
+                old_date=course.completed_at,
+                new_date=payload.completed_at,
+            )
         course.completed_at = payload.completed_at
     if "hours" in payload.model_fields_set:
         if payload.hours is None:
@@ -138,7 +331,6 @@ def update_course(
                 status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
                 detail="hours cannot be null",
             )
-        _validate_hours(payload.hours)
         course.hours = payload.hours
 
     session.commit()
@@ -173,11 +365,9 @@ def delete_course(
     )
 
     session.delete(course)
+    release_certificate_blobs(session, certificate_paths)
     session.commit()
 
-    for blob_path in certificate_paths:
-        delete_certificate_blob(blob_path)
-
 
 @router.post("/{course_id}/certificates", response_model=CertificateOut, status_code=status.HTTP_201_CREATED)
 def upload_certificate(
@@ -195,14 +385,209 @@ def upload_certificate(
     if not course:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    blob_path, size_bytes = save_certificate_upload(file)
+    blob_path, size_bytes, content_sha256 = store_certificate_upload(session, file)
 
     certificate = Certificate(
+        user_id=current_user.id,
         course_credit_id=course.id,
         filename=file.filename or "certificate",
         content_type=file.content_type,
         size_bytes=size_bytes,
         blob_path=blob_path,
+        content_sha256=content_sha256,
+    )
+    session.add(certificate)
+    session.commit()
+    session.refresh(certificate)
+    return CertificateOut.model_validate(certificate)
+
+
+@router.post(
+    "/{course_id}/certificates/stream",
+    response_model=CertificateOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_certificate_stream(
+    course_id: uuid.UUID,
+    request: Request,
+    filename: str = Query(min_length=1, max_length=255),
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+) -> CertificateOut:
+    """Store the raw request body as a certificate while it is still arriving.
+
+    Unlike the multipart endpoint nothing is spooled to disk first; the body
+    is piped into storage chunk by chunk. Database work runs in the
+    threadpool so the event loop is never blocked, and no transaction is
+    open while the body arrives, so slow uploads do not hold pool connections.
+    """
+    user_id = current_user.id
+    owned_course = select(CourseCredit.id).where(
+        CourseCredit.id == course_id,
+        CourseCredit.user_id == user_id,
+    )
+
+    def _check_owner() -> Optional[uuid.UUID]:
+        try:
+            return session.scalar(owned_course)
+        finally:
+            # Ending the transaction returns the connection to the pool.
+            session.rollback()
+
+    if not await run_in_threadpool(_check_owner):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    max_bytes = get_cert_max_upload_bytes()
+    declared_length = request.headers.get("content-length", "")
+    if declared_length.isdigit() and int(declared_length) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail="Certificate is too large",
+        )
+
+    content_type = request.headers.get("content-type")
+    try:
+        staged_path, size_bytes, content_sha256 = await stream_certificate_upload(
+            request.stream(), content_type, max_bytes
+        )
+    except CertificateTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail="Certificate is too large",
+        )
+    except CertificateUploadError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(error),
+        )
+    except ClientDisconnect:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload interrupted")
+
+    def _save() -> Certificate:
+        # The course may have been deleted while the body was streaming.
+        if not session.scalar(owned_course.with_for_update(read=True)):
+            session.rollback()
+            delete_certificate_blob(staged_path)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+        certificate = Certificate(
+            user_id=user_id,
+            course_credit_id=course_id,
+            filename=filename,
+            content_type=content_type,
+            size_bytes=size_bytes,
+            blob_path=adopt_staged_certificate(session, staged_path, content_sha256, size_bytes),
+            content_sha256=content_sha256,
+        )
+        session.add(certificate)
+        session.commit()
+        session.refresh(certificate)
+        return certificate
+
+    certificate = await run_in_threadpool(_save)
+    return CertificateOut.model_validate(certificate)
+
+
+@router.post(
+    "/{course_id}/certificates/upload-url",
+    response_model=CertificateUploadUrlOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_certificate_upload_url(
+    course_id: uuid.UUID,
+    payload: CertificateUploadUrlCreate,
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+) -> CertificateUploadUrlOut:
+    course = session.scalar(
+        select(CourseCredit).where(
+            CourseCredit.id == course_id,
+            CourseCredit.user_id == current_user.id,
+        )
+    )
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if is_local_storage():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Direct uploads require S3 certificate storage",
+        )
+    if payload.size_bytes > get_cert_max_upload_bytes():
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail="Certificate is too large",
+        )
+
+    url, fields, blob_path, expires_in = create_certificate_upload_post(
+        course.id, payload.filename, payload.content_type, payload.content_sha256
+    )
+    return CertificateUploadUrlOut(
+        url=url,
+        fields=fields,
+        blob_path=blob_path,
+        expires_in=expires_in,
+    )
+
+
+@router.post(
+    "/{course_id}/certificates/complete",
+    response_model=CertificateOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def complete_certificate_upload(
+    course_id: uuid.UUID,
+    payload: CertificateUploadComplete,
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+) -> CertificateOut:
+    course = session.scalar(
+        select(CourseCredit).where(
+            CourseCredit.id == course_id,
+            CourseCredit.user_id == current_user.id,
+        )
+    )
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if is_local_storage():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Direct uploads require S3 certificate storage",
+        )
+
+    scope = get_certificate_upload_scope(course.id)
+    object_name = payload.blob_path.removeprefix(scope)
+    if object_name == payload.blob_path or not object_name or "/" in object_name:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+    try:
+        head = head_certificate_object(payload.blob_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+    size_bytes = head.get("ContentLength") or 0
+    if size_bytes > get_cert_max_upload_bytes():
+        delete_certificate_blob(payload.blob_path)
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail="Certificate is too large",
+        )
+
+    content_sha256 = object_content_sha256(head)
+    if content_sha256 is None:
+        delete_certificate_blob(payload.blob_path)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Upload has no SHA-256 checksum",
+        )
+    blob_path = adopt_staged_certificate(session, payload.blob_path, content_sha256, size_bytes)
+
+    certificate = Certificate(
+        user_id=current_user.id,
+        course_credit_id=course.id,
+        filename=payload.filename,
+        content_type=head.get("ContentType"),
+        size_bytes=size_bytes,
+        blob_path=blob_path,
+        content_sha256=content_sha256,
     )
     session.add(certificate)
     session.commit()
@@ -213,6 +598,9 @@ def upload_certificate(
 @router.get("/{course_id}/certificates", response_model=List[CertificateOut])
 def list_certificates(
     course_id: uuid.UUID,
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(default=None),
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> List[CertificateOut]:
@@ -225,7 +613,17 @@ def list_certificates(
     if not course:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    certificates = session.scalars(
-        select(Certificate).where(Certificate.course_credit_id == course.id)
-    ).all()
+    stmt = apply_keyset(
+        select(Certificate).where(Certificate.course_credit_id == course.id),
+        [Certificate.created_at, Certificate.id],
+        [datetime.fromisoformat, uuid.UUID],
+        cursor,
+        limit,
+    )
+    certificates = finish_page(
+        session.scalars(stmt).all(),
+        limit,
+        lambda cert: (cert.created_at, cert.id),
+        response,
+    )
     return [CertificateOut.model_validate(cert) for cert in certificates]
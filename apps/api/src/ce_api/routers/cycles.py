@@ -1,19 +1,30 @@
 from __future__ import annotations
 
 import uuid
+from datetime import date
 from decimal import Decimal
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
+from ce_api.audit_packet import AuditPacketRow, iter_audit_packet
+from ce_api.auto_allocation import allocate_covered_courses_to_cycle
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
-from ce_api.models import CreditAllocation, LicenseCycle, StateLicense, User
-from ce_api.schemas import LicenseCycleCreate, LicenseCycleOut, LicenseCycleUpdate
+from ce_api.models import Certificate, CourseCredit, CreditAllocation, LicenseCycle, StateLicense, User
+from ce_api.pagination import MAX_PAGE_LIMIT, apply_keyset, finish_page
+from ce_api.request_timing import TimedRoute
+from ce_api.schemas import (
+    CycleAutoAllocation,
+    LicenseCycleCreate,
+    LicenseCycleOut,
+    LicenseCycleUpdate,
+)
 
-router = APIRouter(prefix="/cycles", tags=["cycles"])
+router = APIRouter(prefix="/cycles", tags=["cycles"], route_class=TimedRoute)
 
 
 def _validate_cycle_dates(start, end) -> None:
@@ -32,9 +43,16 @@ def _validate_required_hours(required_hours: Decimal) -> None:
         )
 
 
+def _auto_allocate(session: Session, current_user: User, cycle: LicenseCycle) -> CycleAutoAllocation:
+    session.flush()
+    created, already_allocated = allocate_covered_courses_to_cycle(session, current_user.id, cycle)
+    return CycleAutoAllocation(created=created, already_allocated=already_allocated)
+
+
 @router.post("", response_model=LicenseCycleOut, status_code=status.HTTP_201_CREATED)
 def create_cycle(
     payload: LicenseCycleCreate,
+    auto_allocate: bool = Query(default=False),
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> LicenseCycleOut:
@@ -51,33 +69,47 @@ def create_cycle(
     _validate_required_hours(payload.required_hours)
 
     cycle = LicenseCycle(
+        user_id=current_user.id,
         state_license_id=payload.state_license_id,
         cycle_start=payload.cycle_start,
         cycle_end=payload.cycle_end,
         required_hours=payload.required_hours,
     )
     session.add(cycle)
+    auto_allocation = _auto_allocate(session, current_user, cycle) if auto_allocate else None
     session.commit()
     session.refresh(cycle)
-    return LicenseCycleOut.model_validate(cycle)
+    result = LicenseCycleOut.model_validate(cycle)
+    result.auto_allocation = auto_allocation
+    return result
 
 
 @router.get("", response_model=List[LicenseCycleOut])
 def list_cycles(
+    response: Response,
     state_license_id: Optional[uuid.UUID] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(default=None),
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> List[LicenseCycleOut]:
-    stmt = (
-        select(LicenseCycle)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(StateLicense.user_id == current_user.id)
-        .order_by(LicenseCycle.cycle_end.asc())
-    )
+    stmt = select(LicenseCycle).where(LicenseCycle.user_id == current_user.id)
     if state_license_id:
         stmt = stmt.where(LicenseCycle.state_license_id == state_license_id)
 
-    cycles = session.scalars(stmt).all()
+    stmt = apply_keyset(
+        stmt,
+        [LicenseCycle.cycle_end, LicenseCycle.id],
+        [date.fromisoformat, uuid.UUID],
+        cursor,
+        limit,
+    )
+    cycles = finish_page(
+        session.scalars(stmt).all(),
+        limit,
+        lambda cycle: (cycle.cycle_end, cycle.id),
+        response,
+    )
     return [LicenseCycleOut.model_validate(cycle) for cycle in cycles]
 
 
@@ -87,13 +119,9 @@ def get_cycle(
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> LicenseCycleOut:
-    stmt = (
-        select(LicenseCycle)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(
-            LicenseCycle.id == cycle_id,
-            StateLicense.user_id == current_user.id,
-        )
+    stmt = select(LicenseCycle).where(
+        LicenseCycle.id == cycle_id,
+        LicenseCycle.user_id == current_user.id,
     )
     cycle = session.scalar(stmt)
     if not cycle:
@@ -101,20 +129,90 @@ def get_cycle(
     return LicenseCycleOut.model_validate(cycle)
 
 
-@router.patch("/{cycle_id}", response_model=LicenseCycleOut)
-def update_cycle(
+@router.get("/{cycle_id}/audit-packet")
+def download_audit_packet(
     cycle_id: uuid.UUID,
-    payload: LicenseCycleUpdate,
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
-) -> LicenseCycleOut:
-    stmt = (
-        select(LicenseCycle)
+) -> StreamingResponse:
+    cycle_row = session.execute(
+        select(LicenseCycle, StateLicense.state_code)
         .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
         .where(
             LicenseCycle.id == cycle_id,
-            StateLicense.user_id == current_user.id,
+            LicenseCycle.user_id == current_user.id,
         )
+    ).one_or_none()
+    if not cycle_row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    cycle, state_code = cycle_row
+
+    # Rows are materialized here; the ZIP itself is built after this
+    # handler returns, once the session may already be closed.
+    rows = [
+        AuditPacketRow(
+            course_id=row.id,
+            course_title=row.title,
+            provider=row.provider,
+            completed_at=row.completed_at,
+            hours=row.hours,
+            certificate_filename=row.filename,
+            blob_path=row.blob_path,
+            size_bytes=row.size_bytes,
+            content_sha256=row.content_sha256,
+            created_at=row.created_at,
+        )
+        for row in session.execute(
+            select(
+                CourseCredit.id,
+                CourseCredit.title,
+                CourseCredit.provider,
+                CourseCredit.completed_at,
+                CourseCredit.hours,
+                Certificate.filename,
+                Certificate.blob_path,
+                Certificate.size_bytes,
+                Certificate.content_sha256,
+                Certificate.created_at,
+            )
+            .select_from(CreditAllocation)
+            .join(CourseCredit, CreditAllocation.course_credit_id == CourseCredit.id)
+            .outerjoin(Certificate, Certificate.course_credit_id == CourseCredit.id)
+            .where(
+                CreditAllocation.license_cycle_id == cycle.id,
+                CreditAllocation.user_id == current_user.id,
+            )
+            .order_by(
+                CourseCredit.completed_at,
+                CourseCredit.id,
+                Certificate.created_at,
+                Certificate.id,
+            )
+        )
+    ]
+
+    filename = f"audit-{state_code}-{cycle.cycle_start.isoformat()}-{cycle.cycle_end.isoformat()}.zip"
+    return StreamingResponse(
+        iter_audit_packet(rows),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "private, no-store",
+        },
+    )
+
+
+@router.patch("/{cycle_id}", response_model=LicenseCycleOut)
+def update_cycle(
+    cycle_id: uuid.UUID,
+    payload: LicenseCycleUpdate,
+    auto_allocate: bool = Query(default=False),
+    session: Session = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+) -> LicenseCycleOut:
+    stmt = select(LicenseCycle).where(
+        LicenseCycle.id == cycle_id,
+        LicenseCycle.user_id == current_user.id,
     )
     cycle = session.scalar(stmt)
     if not cycle:
@@ -145,9 +243,12 @@ def update_cycle(
     _validate_cycle_dates(cycle.cycle_start, cycle.cycle_end)
     _validate_required_hours(cycle.required_hours)
 
+    auto_allocation = _auto_allocate(session, current_user, cycle) if auto_allocate else None
     session.commit()
     session.refresh(cycle)
-    return LicenseCycleOut.model_validate(cycle)
+    result = LicenseCycleOut.model_validate(cycle)
+    result.auto_allocation = auto_allocation
+    return result
 
 
 @router.delete("/{cycle_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -156,13 +257,9 @@ def delete_cycle(
     session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ) -> None:
-    stmt = (
-        select(LicenseCycle)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(
-            LicenseCycle.id == cycle_id,
-            StateLicense.user_id == current_user.id,
-        )
+    stmt = select(LicenseCycle).where(
+        LicenseCycle.id == cycle_id,
+        LicenseCycle.user_id == current_user.id,
     )
     cycle = session.scalar(stmt)
     if not cycle:
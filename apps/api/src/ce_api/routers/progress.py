@@ -13,9 +13,10 @@ from sqlalchemy.orm import Session
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
 from ce_api.models import CreditAllocation, CourseCredit, LicenseCycle, StateLicense, User
+from ce_api.request_timing import TimedRoute
 from ce_api.schemas import ProgressOut, ProgressWarning
 
-router = APIRouter(prefix="/progress", tags=["progress"])
+router = APIRouter(prefix="/progress", tags=["progress"], route_class=TimedRoute)
 
 
 def get_today() -> date:
@@ -37,7 +38,7 @@ def get_progress(
     cycles = session.execute(
         select(LicenseCycle, StateLicense.state_code)
         .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(StateLicense.user_id == current_user.id)
+        .where(LicenseCycle.user_id == current_user.id)
         .order_by(LicenseCycle.cycle_end.asc())
     ).all()
 
@@ -45,6 +46,7 @@ def get_progress(
         return []
 
     cycle_ids = [cycle.id for cycle, _state in cycles]
+    cycle_state: Dict[uuid.UUID, str] = {cycle.id: state_code for cycle, state_code in cycles}
 
     allocation_rows = session.execute(
         select(
@@ -52,13 +54,10 @@ def get_progress(
             CourseCredit.id.label("course_id"),
             CourseCredit.title,
             CourseCredit.hours,
-            StateLicense.state_code,
         )
         .join(CourseCredit, CreditAllocation.course_credit_id == CourseCredit.id)
-        .join(LicenseCycle, CreditAllocation.license_cycle_id == LicenseCycle.id)
-        .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
         .where(
-            StateLicense.user_id == current_user.id,
+            CreditAllocation.user_id == current_user.id,
             CreditAllocation.license_cycle_id.in_(cycle_ids),
         )
     ).all()
@@ -69,7 +68,7 @@ def get_progress(
     for row in allocation_rows:
         earned_by_cycle[row.license_cycle_id] += _to_decimal(row.hours)
 
-        key = (row.state_code, row.course_id)
+        key = (cycle_state[row.license_cycle_id], row.course_id)
         if key not in course_state_cycles:
             course_state_cycles[key] = {
                 "course_title": row.title,
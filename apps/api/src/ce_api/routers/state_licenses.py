@@ -11,9 +11,10 @@ from sqlalchemy.orm import Session
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
 from ce_api.models import LicenseCycle, StateLicense, User
+from ce_api.request_timing import TimedRoute
 from ce_api.schemas import StateLicenseCreate, StateLicenseOut, StateLicenseUpdate
 
-router = APIRouter(prefix="/state-licenses", tags=["state-licenses"])
+router = APIRouter(prefix="/state-licenses", tags=["state-licenses"], route_class=TimedRoute)
 
 
 @router.post("", response_model=StateLicenseOut, status_code=status.HTTP_201_CREATED)
@@ -13,6 +13,8 @@ from sqlalchemy.orm import Session
 from ce_api.db.session import get_db_session
 from ce_api.deps import get_current_user
 from ce_api.models import Certificate, CreditAllocation, CourseCredit, LicenseCycle, StateLicense, User
+from ce_api.models.license_cycle import cycle_period, date_period
+from ce_api.request_timing import TimedRoute
 from ce_api.schemas import (
     ProgressWarning,
     TimelineCertificate,
@@ -23,7 +25,7 @@ from ce_api.schemas import (
     TimelineState,
 )
 
-router = APIRouter(prefix="/timeline", tags=["timeline"])
+router = APIRouter(prefix="/timeline", tags=["timeline"], route_class=TimedRoute)
 
 
 def get_today() -> date:
@@ -56,17 +58,19 @@ def get_timeline(
     from_date: Optional[date] = Query(None, alias="from"),
     to_date: Optional[date] = Query(None, alias="to"),
 ) -> TimelineResponse:
+    if from_date and to_date and from_date > to_date:
+        # daterange() rejects an inverted window; nothing can overlap it anyway.
+        return TimelineResponse(states=[])
+
     stmt = (
         select(LicenseCycle, StateLicense.state_code, StateLicense.license_number)
         .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(StateLicense.user_id == current_user.id)
+        .where(LicenseCycle.user_id == current_user.id)
         .order_by(StateLicense.state_code.asc(), LicenseCycle.cycle_end.asc())
     )
 
-    if from_date:
-        stmt = stmt.where(LicenseCycle.cycle_end >= from_date)
-    if to_date:
-        stmt = stmt.where(LicenseCycle.cycle_start <= to_date)
+    if from_date or to_date:
+        stmt = stmt.where(cycle_period().op("&&")(date_period(from_date, to_date)))
 
     cycle_rows = session.execute(stmt).all()
     if not cycle_rows:
@@ -82,7 +86,7 @@ def get_timeline(
         .join(CourseCredit, CreditAllocation.course_credit_id == CourseCredit.id)
         .where(
             CreditAllocation.license_cycle_id.in_(cycle_ids),
-            CourseCredit.user_id == current_user.id,
+            CreditAllocation.user_id == current_user.id,
         )
     ).all()
 
@@ -215,7 +219,7 @@ def get_timeline_events(
     cycle_stmt = (
         select(LicenseCycle, StateLicense.state_code)
         .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
-        .where(StateLicense.user_id == current_user.id)
+        .where(LicenseCycle.user_id == current_user.id)
         .order_by(StateLicense.state_code.asc(), LicenseCycle.cycle_end.asc())
     )
     if state:
@@ -240,7 +244,7 @@ def get_timeline_events(
             .join(LicenseCycle, CreditAllocation.license_cycle_id == LicenseCycle.id)
             .join(StateLicense, LicenseCycle.state_license_id == StateLicense.id)
             .where(
-                StateLicense.user_id == current_user.id,
+                CreditAllocation.user_id == current_user.id,
                 CreditAllocation.license_cycle_id.in_(cycle_ids),
             )
         ).all()
@@ -250,11 +254,18 @@ def get_timeline_events(
     ).all()
     course_map: Dict[uuid.UUID, CourseCredit] = {course.id: course for course in courses}
 
-    course_ids = set(course_map.keys())
+    # A state filter only keeps courses allocated to that state's cycles.
+    if state:
+        course_ids = {course.id for _cycle_id, course, *_cycle in allocation_rows}
+    else:
+        course_ids = set(course_map)
     cert_rows = []
     if course_ids:
         cert_rows = session.scalars(
-            select(Certificate).where(Certificate.course_credit_id.in_(course_ids))
+            select(Certificate).where(
+                Certificate.user_id == current_user.id,
+                Certificate.course_credit_id.in_(course_ids),
+            )
         ).all()
 
     certs_by_course: Dict[uuid.UUID, List[dict]] = defaultdict(list)
@@ -3,7 +3,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 
 class UserMe(BaseModel):
@@ -72,6 +72,13 @@ class LicenseCycleUpdate(BaseModel):
     required_hours: Optional[Decimal] = None
 
 
+class CycleAutoAllocation(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    created: int
+    already_allocated: int
+
+
 class LicenseCycleOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -82,6 +89,11 @@ class LicenseCycleOut(BaseModel):
     required_hours: Decimal
     created_at: datetime
     updated_at: datetime
+    auto_allocation: Optional[CycleAutoAllocation] = None
+
+
+# Largest value course_credits.hours (NUMERIC(6, 2)) can hold.
+MAX_COURSE_HOURS = Decimal("9999.99")
 
 
 class CourseBase(BaseModel):
@@ -90,7 +102,7 @@ class CourseBase(BaseModel):
     title: str
     provider: Optional[str] = None
     completed_at: date
-    hours: Decimal
+    hours: Decimal = Field(gt=0, le=MAX_COURSE_HOURS)
 
 
 class CourseCreate(CourseBase):
@@ -103,7 +115,7 @@ class CourseUpdate(BaseModel):
     title: Optional[str] = None
     provider: Optional[str] = None
     completed_at: Optional[date] = None
-    hours: Optional[Decimal] = None
+    hours: Optional[Decimal] = Field(default=None, gt=0, le=MAX_COURSE_HOURS)
 
 
 class CourseOut(BaseModel):
@@ -118,6 +130,25 @@ class CourseOut(BaseModel):
     updated_at: datetime
 
 
+class CourseImportRow(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    row: int
+    status: str
+    course_id: Optional[uuid.UUID] = None
+    allocated_cycle_ids: List[uuid.UUID] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class CourseImportResult(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    created_count: int
+    error_count: int
+    allocation_count: int
+    rows: List[CourseImportRow]
+
+
 class AllocationOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -127,18 +158,37 @@ class AllocationOut(BaseModel):
     created_at: datetime
 
 
+class AllocationPair(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    course_credit_id: uuid.UUID
+    license_cycle_id: uuid.UUID
+
+
 class AllocationBulkCreate(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
-    course_id: uuid.UUID
+    course_id: Optional[uuid.UUID] = None
+    course_ids: List[uuid.UUID] = Field(default_factory=list)
     cycle_ids: List[uuid.UUID]
 
+    @model_validator(mode="after")
+    def require_courses(self) -> "AllocationBulkCreate":
+        if self.course_id is None and not self.course_ids:
+            raise ValueError("course_id or course_ids is required")
+        return self
+
+    def all_course_ids(self) -> List[uuid.UUID]:
+        course_ids = [self.course_id] if self.course_id else []
+        return list(dict.fromkeys(course_ids + self.course_ids))
+
 
 class AllocationBulkResult(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     created: List[AllocationOut]
     skipped_cycle_ids: List[uuid.UUID]
+    skipped: List[AllocationPair] = Field(default_factory=list)
 
 
 class ProgressWarning(BaseModel):
@@ -245,4 +295,47 @@ class CertificateOut(BaseModel):
     content_type: Optional[str]
     size_bytes: Optional[int]
     blob_path: str
+    content_sha256: Optional[str]
     created_at: datetime
+
+
+class CertificateUploadUrlCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str = Field(min_length=1, max_length=255)
+    size_bytes: int = Field(gt=0)
+    content_sha256: str = Field(pattern=r"^[0-9a-f]{64}$")
+
+
+class CertificateUploadUrlOut(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    url: str
+    fields: Dict[str, str]
+    blob_path: str
+    expires_in: int
+
+
+class CertificateUploadComplete(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    blob_path: str = Field(min_length=1)
+    filename: str = Field(min_length=1, max_length=255)
+
+
+class WarmupStepOut(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    name: str
+    status: str
+    duration_ms: float
+    attempts: int
+    detail: Optional[str] = None
+
+
+class ReadinessOut(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    status: str
+    steps: List[WarmupStepOut]
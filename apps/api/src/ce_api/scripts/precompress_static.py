@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from ce_api.static_files import ENCODINGS, compress, is_compressible
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write maximum-effort .br and .gz siblings for the built SPA"
+    )
+    parser.add_argument("static_dir", type=Path)
+    return parser.parse_args()
+
+
+def precompress_static(static_dir: Path) -> int:
+    """Compress each compressible file once at build time so startup only reads them."""
+    written = 0
+    for path in sorted(static_dir.rglob("*")):
+        if not path.is_file() or not is_compressible(path):
+            continue
+        content = path.read_bytes()
+        for encoding, suffix in ENCODINGS:
+            path.with_name(path.name + suffix).write_bytes(compress(content, encoding, best=True))
+            written += 1
+    return written
+
+
+def main() -> None:
+    args = parse_args()
+    written = precompress_static(args.static_dir)
+    print(f"Wrote {written} precompressed files under {args.static_dir}")
+
+
+if __name__ == "__main__":
+    main()
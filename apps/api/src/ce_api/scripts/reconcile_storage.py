@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Select, collate, create_engine, select, union
+from sqlalchemy.orm import Session
+
+from ce_api.models import Certificate, CertificateBlob
+from ce_api.previews import preview_content_sha256
+from ce_api.storage import (
+    DEFAULT_LOCAL_DELETE_WORKERS,
+    S3_DELETE_BATCH_SIZE,
+    StoredBlob,
+    delete_certificate_blobs,
+    get_storage_area_prefix,
+    head_certificate_object,
+    is_local_storage,
+    iter_stored_blobs,
+)
+
+PREVIEW_AREA = "previews"
+DEFAULT_MIN_AGE = timedelta(hours=24)
+# Referenced paths looked up in storage before anything is deleted.
+REFERENCE_SAMPLE_SIZE = 100
+
+
+@dataclass
+class ReconcileResult:
+    scanned: int = 0
+    orphaned: int = 0
+    orphaned_bytes: int = 0
+    too_recent: int = 0
+    deleted: int = 0
+    failed: int = 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Delete stored certificate blobs and previews that no row references"
+    )
+    parser.add_argument("--batch-size", type=int, default=S3_DELETE_BATCH_SIZE)
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=DEFAULT_MIN_AGE.total_seconds() / 3600,
+        help="Leave objects younger than this alone; uploads are written before their row commits",
+    )
+    parser.add_argument("--max-deletes-per-second", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=DEFAULT_LOCAL_DELETE_WORKERS)
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args()
+
+
+def _referenced_blob_paths_stmt() -> Select:
+    referenced = union(
+        select(Certificate.blob_path), select(CertificateBlob.blob_path)
+    ).subquery()
+    return select(referenced.c.blob_path).order_by(collate(referenced.c.blob_path, "C"))
+
+
+def _referenced_blob_paths(session: Session, batch_size: int) -> Iterator[str]:
+    """Stream every referenced blob path in byte order, matching the storage listing."""
+    stmt = _referenced_blob_paths_stmt()
+    return iter(session.scalars(stmt, execution_options={"yield_per": batch_size}))
+
+
+def _storage_root() -> str:
+    root = get_storage_area_prefix()
+    return os.path.join(os.path.abspath(root), "") if is_local_storage() else root
+
+
+def _storage_key(blob_path: str, root: str) -> Optional[str]:
+    """Return ``blob_path`` relative to the storage root, or None if it lies elsewhere.
+
+    Local paths are made absolute first, so ``data/certs`` and
+    ``/app/data/certs`` name the same files.
+    """
+    if is_local_storage():
+        blob_path = os.path.abspath(blob_path)
+    if not blob_path.startswith(root):
+        return None
+    return blob_path[len(root) :]
+
+
+def _storage_keys(blob_paths: Iterable[str], root: str) -> Iterator[str]:
+    previous = ""
+    for blob_path in blob_paths:
+        key = _storage_key(blob_path, root)
+        if key is None:
+            continue
+        if key < previous:
+            # Only happens when rows spell the storage root in more than one
+            # way; merging out-of-order keys would report live blobs as orphans.
+            raise RuntimeError(f"Referenced blob paths are not in storage order at {blob_path!r}")
+        previous = key
+        yield key
+
+
+def _is_stored(key: str, root: str) -> bool:
+    if is_local_storage():
+        return os.path.isfile(root + key)
+    try:
+        head_certificate_object(root + key)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _check_references_resolve(session: Session, root: str) -> None:
+    """Refuse to run if none of a sample of referenced paths is in storage.
+
+    That means ``CERT_STORAGE_DIR`` or ``CERT_STORAGE_PREFIX`` differs from
+    the API's, and every live blob would look orphaned.
+    """
+    sample = list(session.scalars(_referenced_blob_paths_stmt().limit(REFERENCE_SAMPLE_SIZE)))
+    keys = (_storage_key(blob_path, root) for blob_path in sample)
+    if sample and not any(key is not None and _is_stored(key, root) for key in keys):
+        raise RuntimeError(
+            f"None of {len(sample)} referenced blobs was found under {root!r}; "
+            "check that the storage settings match the API's"
+        )
+
+
+def _unreferenced_blobs(
+    listing: Iterable[StoredBlob],
+    referenced: Iterator[str],
+    root: str,
+) -> Iterator[StoredBlob]:
+    """Merge two sorted streams and yield listed blobs missing from ``referenced``.
+
+    Both sides are compared as keys relative to the storage root.
+    """
+    current = next(referenced, None)
+    for blob in listing:
+        key = _storage_key(blob.blob_path, root)
+        while current is not None and current < key:
+            current = next(referenced, None)
+        if current != key:
+            yield blob
+
+
+def _unreferenced_previews(
+    session: Session,
+    listing: Iterable[StoredBlob],
+    batch_size: int,
+) -> Iterator[StoredBlob]:
+    """Yield previews whose content hash no longer has a ``certificate_blobs`` row."""
+    while batch := list(itertools.islice(listing, batch_size)):
+        hashes = {preview_content_sha256(Path(blob.blob_path).name) for blob in batch}
+        live = set(
+            session.scalars(select(CertificateBlob.sha256).where(CertificateBlob.sha256.in_(hashes)))
+        )
+        for blob in batch:
+            if preview_content_sha256(Path(blob.blob_path).name) not in live:
+                yield blob
+
+
+def reconcile_storage(
+    session: Session,
+    batch_size: int = S3_DELETE_BATCH_SIZE,
+    min_age: timedelta = DEFAULT_MIN_AGE,
+    dry_run: bool = False,
+    max_deletes_per_second: float = 0.0,
+    workers: int = DEFAULT_LOCAL_DELETE_WORKERS,
+) -> ReconcileResult:
+    """Find stored objects nothing references and delete them in batches.
+
+    The storage listing and the referenced ``blob_path`` values are both
+    streamed in byte order and merged, so neither side is held in memory.
+    Previews are checked against ``certificate_blobs`` a batch at a time.
+    Objects younger than ``min_age`` are skipped because uploads reach
+    storage before their rows commit. The run stops before deleting anything
+    if none of the referenced paths can be found in storage.
+    """
+    root = _storage_root()
+    _check_references_resolve(session, root)
+    result = ReconcileResult()
+    cutoff = datetime.now(timezone.utc) - min_age
+    if max_deletes_per_second > 0:
+        batch_size = max(1, min(batch_size, int(max_deletes_per_second)))
+
+    def _counted(listing: Iterable[StoredBlob]) -> Iterator[StoredBlob]:
+        for blob in listing:
+            result.scanned += 1
+            yield blob
+
+    preview_prefix = get_storage_area_prefix(PREVIEW_AREA)
+    listing = (blob for blob in iter_stored_blobs() if not blob.blob_path.startswith(preview_prefix))
+    referenced = _storage_keys(_referenced_blob_paths(session, batch_size), root)
+    blobs = _unreferenced_blobs(_counted(listing), referenced, root)
+    previews = _unreferenced_previews(session, _counted(iter_stored_blobs(PREVIEW_AREA)), batch_size)
+    orphans = itertools.chain(blobs, previews)
+
+    started = time.monotonic()
+    while batch := list(itertools.islice(orphans, batch_size)):
+        expired = []
+        for blob in batch:
+            if blob.modified_at > cutoff:
+                result.too_recent += 1
+                continue
+            result.orphaned += 1
+            result.orphaned_bytes += blob.size_bytes
+            expired.append(blob.blob_path)
+        if dry_run or not expired:
+            continue
+
+        failed = delete_certificate_blobs(expired, workers=workers)
+        result.failed += len(failed)
+        result.deleted += len(expired) - len(failed)
+        if max_deletes_per_second > 0:
+            ahead = result.deleted / max_deletes_per_second - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+    return result
+
+
+def main() -> None:
+    args = parse_args()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL must be set")
+
+    engine = create_engine(database_url, pool_pre_ping=True)
+    with Session(engine) as session:
+        result = reconcile_storage(
+            session,
+            batch_size=args.batch_size,
+            min_age=timedelta(hours=args.min_age_hours),
+            dry_run=args.dry_run,
+            max_deletes_per_second=args.max_deletes_per_second,
+            workers=args.workers,
+        )
+
+    action = "Would delete" if args.dry_run else "Deleted"
+    count = result.orphaned if args.dry_run else result.deleted
+    print(
+        f"Scanned {result.scanned} objects. {action} {count} orphans "
+        f"({result.orphaned_bytes} bytes); {result.too_recent} too recent, {result.failed} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
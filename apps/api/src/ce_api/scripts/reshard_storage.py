@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+
+from ce_api.models import Certificate, CertificateBlob
+from ce_api.storage import (
+    get_cert_storage_dir,
+    is_local_storage,
+    is_sharded_path,
+    move_local_file,
+    shard_path,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Move local certificate blobs into the two-level shard layout"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args()
+
+
+def reshard_blob_paths(
+    session: Session,
+    storage_dir: Path,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> tuple[int, int]:
+    """Move every referenced blob into its shard and repoint the rows.
+
+    Walks distinct ``certificates.blob_path`` values in sorted batches and
+    commits after each one. A file is moved before its rows are updated, so
+    a rerun after a crash finds the file already in place and only fixes
+    the rows. Returns ``(moved, missing)``.
+    """
+    moved = 0
+    missing = 0
+    last_path = ""
+    while True:
+        blob_paths = session.scalars(
+            select(Certificate.blob_path)
+            .where(Certificate.blob_path > last_path)
+            .distinct()
+            .order_by(Certificate.blob_path)
+            .limit(batch_size)
+        ).all()
+        if not blob_paths:
+            break
+        last_path = blob_paths[-1]
+
+        for blob_path in blob_paths:
+            source = Path(blob_path)
+            if is_sharded_path(storage_dir, source):
+                continue
+            target = shard_path(storage_dir, source.name)
+            if not source.exists() and not target.exists():
+                missing += 1
+                continue
+
+            moved += 1
+            if dry_run:
+                continue
+            if source.exists():
+                move_local_file(source, target)
+            session.execute(
+                update(Certificate)
+                .where(Certificate.blob_path == blob_path)
+                .values(blob_path=str(target))
+            )
+            session.execute(
+                update(CertificateBlob)
+                .where(CertificateBlob.blob_path == blob_path)
+                .values(blob_path=str(target))
+            )
+
+        if not dry_run:
+            session.commit()
+    return moved, missing
+
+
+def reshard_previews(storage_dir: Path, dry_run: bool = False) -> int:
+    preview_dir = storage_dir / "previews"
+    if not preview_dir.is_dir():
+        return 0
+
+    moved = 0
+    for path in preview_dir.iterdir():
+        if not path.is_file():
+            continue
+        moved += 1
+        if not dry_run:
+            move_local_file(path, shard_path(preview_dir, path.name))
+    return moved
+
+
+def main() -> None:
+    args = parse_args()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL must be set")
+    if not is_local_storage():
+        raise RuntimeError("Resharding only applies to local storage; unset CERT_STORAGE_BUCKET")
+
+    storage_dir = get_cert_storage_dir()
+    engine = create_engine(database_url, pool_pre_ping=True)
+    with Session(engine) as session:
+        moved, missing = reshard_blob_paths(session, storage_dir, args.batch_size, args.dry_run)
+    previews = reshard_previews(storage_dir, args.dry_run)
+
+    action = "Would move" if args.dry_run else "Moved"
+    print(f"{action} {moved} blobs and {previews} previews; {missing} referenced blobs missing")
+
+
+if __name__ == "__main__":
+    main()
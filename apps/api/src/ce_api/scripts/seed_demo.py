@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 from datetime import date
 from decimal import Decimal
-from pathlib import Path
 import os
 
 from sqlalchemy import create_engine, text
@@ -11,16 +11,18 @@ from sqlalchemy.orm import Session
 
 from ce_api.models import (
     Certificate,
+    CertificateBlob,
     CourseCredit,
     CreditAllocation,
     LicenseCycle,
     StateLicense,
     User,
 )
-from ce_api.storage import get_cert_storage_dir
+from ce_api.storage import content_blob_path, write_certificate_bytes
 
 TRUNCATE_SQL = """
 TRUNCATE certificates,
+         certificate_blobs,
          credit_allocations,
          course_credits,
          license_cycles,
@@ -38,11 +40,17 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def write_demo_file(storage_dir: Path, filename: str) -> tuple[str, int]:
-    content = b"%PDF-1.4\n% demo\n"
-    path = storage_dir / filename
-    path.write_bytes(content)
-    return str(path), len(content)
+def write_demo_blob(session: Session, content: bytes, ref_count: int) -> CertificateBlob:
+    content_sha256 = hashlib.sha256(content).hexdigest()
+    blob = CertificateBlob(
+        sha256=content_sha256,
+        blob_path=content_blob_path(content_sha256),
+        size_bytes=len(content),
+        ref_count=ref_count,
+    )
+    write_certificate_bytes(blob.blob_path, content, "application/pdf")
+    session.add(blob)
+    return blob
 
 
 def seed(session: Session, user_id: str, email: str) -> None:
@@ -57,24 +65,28 @@ def seed(session: Session, user_id: str, email: str) -> None:
     session.flush()
 
     ny_cycle1 = LicenseCycle(
+        user_id=user.id,
         state_license_id=ny.id,
         cycle_start=date(2025, 1, 1),
         cycle_end=date(2026, 12, 31),
         required_hours=Decimal("36.0"),
     )
     ny_cycle2 = LicenseCycle(
+        user_id=user.id,
         state_license_id=ny.id,
         cycle_start=date(2026, 1, 1),
         cycle_end=date(2027, 12, 31),
         required_hours=Decimal("36.0"),
     )
     nj_cycle1 = LicenseCycle(
+        user_id=user.id,
         state_license_id=nj.id,
         cycle_start=date(2025, 1, 1),
         cycle_end=date(2026, 2, 15),
         required_hours=Decimal("40.0"),
     )
     pa_cycle1 = LicenseCycle(
+        user_id=user.id,
         state_license_id=pa.id,
         cycle_start=date(2024, 1, 1),
         cycle_end=date(2026, 1, 15),
@@ -115,33 +127,35 @@ def seed(session: Session, user_id: str, email: str) -> None:
     session.flush()
 
     allocations = [
-        CreditAllocation(course_credit_id=ethics.id, license_cycle_id=ny_cycle1.id),
-        CreditAllocation(course_credit_id=ethics.id, license_cycle_id=ny_cycle2.id),
-        CreditAllocation(course_credit_id=trauma.id, license_cycle_id=ny_cycle2.id),
-        CreditAllocation(course_credit_id=trauma.id, license_cycle_id=nj_cycle1.id),
-        CreditAllocation(course_credit_id=telehealth.id, license_cycle_id=nj_cycle1.id),
-        CreditAllocation(course_credit_id=docs.id, license_cycle_id=pa_cycle1.id),
+        CreditAllocation(user_id=user.id, course_credit_id=ethics.id, license_cycle_id=ny_cycle1.id),
+        CreditAllocation(user_id=user.id, course_credit_id=ethics.id, license_cycle_id=ny_cycle2.id),
+        CreditAllocation(user_id=user.id, course_credit_id=trauma.id, license_cycle_id=ny_cycle2.id),
+        CreditAllocation(user_id=user.id, course_credit_id=trauma.id, license_cycle_id=nj_cycle1.id),
+        CreditAllocation(user_id=user.id, course_credit_id=telehealth.id, license_cycle_id=nj_cycle1.id),
+        CreditAllocation(user_id=user.id, course_credit_id=docs.id, license_cycle_id=pa_cycle1.id),
     ]
     session.add_all(allocations)
 
-    storage_dir = get_cert_storage_dir()
-    ethics_path, ethics_size = write_demo_file(storage_dir, "ethics_refresher_demo.pdf")
-    trauma_path, trauma_size = write_demo_file(storage_dir, "trauma_informed_demo.pdf")
+    demo_blob = write_demo_blob(session, b"%PDF-1.4\n% demo\n", ref_count=2)
 
     certificates = [
         Certificate(
+            user_id=user.id,
             course_credit_id=ethics.id,
             filename="ethics_refresher_demo.pdf",
             content_type="application/pdf",
-            size_bytes=ethics_size,
-            blob_path=ethics_path,
+            size_bytes=demo_blob.size_bytes,
+            blob_path=demo_blob.blob_path,
+            content_sha256=demo_blob.sha256,
         ),
         Certificate(
+            user_id=user.id,
             course_credit_id=trauma.id,
             filename="trauma_informed_demo.pdf",
             content_type="application/pdf",
-            size_bytes=trauma_size,
-            blob_path=trauma_path,
+            size_bytes=demo_blob.size_bytes,
+            blob_path=demo_blob.blob_path,
+            content_sha256=demo_blob.sha256,
         ),
     ]
     session.add_all(certificates)
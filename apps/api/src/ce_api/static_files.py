@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from ce_api.http_cache import etag_matches
+
+INDEX_FILE = "index.html"
+HASHED_ASSET_PREFIX = "assets/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+COMPRESSIBLE_SUFFIXES = {".css", ".html", ".js", ".json", ".map", ".mjs", ".svg", ".txt", ".webmanifest", ".xml"}
+# Preferred first: brotli beats gzip on JS and CSS.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    content: bytes
+    content_type: str
+    etag: str
+    cache_control: str
+    encoded: dict[str, bytes]
+
+
+def compress(content: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=9 if best else 6, mtime=0)
+    import brotli
+
+    return brotli.compress(content, quality=11 if best else 5)
+
+
+def is_compressible(path: Path) -> bool:
+    return path.suffix in COMPRESSIBLE_SUFFIXES
+
+
+def _encoded_variants(path: Path, content: bytes) -> dict[str, bytes]:
+    """Use the ``.br``/``.gz`` files written at build time, compressing any that are missing."""
+    variants = {}
+    for encoding, suffix in ENCODINGS:
+        sibling = path.with_name(path.name + suffix)
+        encoded = sibling.read_bytes() if sibling.is_file() else compress(content, encoding)
+        if len(encoded) < len(content):
+            variants[encoding] = encoded
+    return variants
+
+
+def build_static_manifest(static_dir: Path) -> dict[str, StaticAsset]:
+    """Load every file under ``static_dir`` into memory, keyed by URL path.
+
+    Vite's content-hashed bundles under ``assets/`` are cached forever;
+    everything else, ``index.html`` included, must be revalidated by ETag.
+    """
+    manifest: dict[str, StaticAsset] = {}
+    if not static_dir.is_dir():
+        return manifest
+
+    for path in sorted(static_dir.rglob("*")):
+        if not path.is_file() or any(path.name.endswith(suffix) for _, suffix in ENCODINGS):
+            continue
+        relative = path.relative_to(static_dir).as_posix()
+        content = path.read_bytes()
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        manifest[relative] = StaticAsset(
+            content=content,
+            content_type=content_type,
+            etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"',
+            cache_control=(
+                IMMUTABLE_CACHE_CONTROL
+                if relative.startswith(HASHED_ASSET_PREFIX)
+                else REVALIDATE_CACHE_CONTROL
+            ),
+            encoded=_encoded_variants(path, content) if is_compressible(path) else {},
+        )
+    return manifest
+
+
+def _accepted_encodings(header: Optional[str]) -> set[str]:
+    accepted = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        if name and quality not in {"0", "0.0", "0.00", "0.000"}:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _negotiate(request: Request, asset: StaticAsset) -> Optional[str]:
+    accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+    for encoding, _ in ENCODINGS:
+        if encoding in asset.encoded and encoding in accepted:
+            return encoding
+    return None
+
+
+def static_response(request: Request, asset: StaticAsset) -> Response:
+    encoding = _negotiate(request, asset)
+    # Each encoding is a different byte sequence, so it needs its own strong
+    # ETag or a cache could pair a gzip body with a brotli validator.
+    etag = asset.etag if encoding is None else f'{asset.etag[:-1]}-{encoding}"'
+    headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+    if asset.encoded:
+        headers["Vary"] = "Accept-Encoding"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding is None:
+        return Response(asset.content, media_type=asset.content_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(asset.encoded[encoding], media_type=asset.content_type, headers=headers)
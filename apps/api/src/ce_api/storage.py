@@ -1,17 +1,169 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import json
+import logging
 import os
+import tempfile
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 
-import boto3
-from botocore.exceptions import ClientError
 from fastapi import UploadFile
 
 DEFAULT_CERT_STORAGE_DIR = Path(__file__).resolve().parents[2] / ".data" / "certificates"
 DEFAULT_CERT_CONTENT_TYPE = "application/octet-stream"
+CERT_STREAM_CHUNK_SIZE = 64 * 1024
+CERT_DOWNLOAD_MODES = {"proxy", "redirect"}
+DEFAULT_CERT_DOWNLOAD_URL_TTL_SECONDS = 60
+DEFAULT_CERT_UPLOAD_URL_TTL_SECONDS = 300
+DEFAULT_CERT_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+MIN_S3_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_CERT_UPLOAD_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_CERT_UPLOAD_CONCURRENCY = 4
+DEFAULT_CERT_CACHE_MAX_OBJECT_BYTES = 2 * 1024 * 1024
+DEFAULT_CERT_CACHE_STATS_INTERVAL_SECONDS = 300
+S3_DELETE_BATCH_SIZE = 1000
+DEFAULT_LOCAL_DELETE_WORKERS = 8
+
+LOGGER = logging.getLogger(__name__)
 
 _S3_CLIENT = None
+_READ_CACHE: _BlobReadCache | None = None
+_READ_CACHE_LOCK = threading.Lock()
+
+
+class CertificateUploadError(Exception):
+    """Raised when a streamed certificate upload is rejected."""
+
+
+class CertificateTooLargeError(CertificateUploadError):
+    """Raised once a streamed upload passes the configured size limit."""
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    current_bytes: int
+    max_bytes: int
+
+
+class _BlobReadCache:
+    """Thread-safe LRU of whole blobs, bounded by their total size in bytes.
+
+    Lookups log the counters as a ``certificate_cache`` JSON line at most
+    once per ``stats_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_object_bytes: int,
+        stats_interval: float = DEFAULT_CERT_CACHE_STATS_INTERVAL_SECONDS,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_object_bytes = min(max_object_bytes, max_bytes)
+        self.stats_interval = stats_interval
+        self._stats_logged_at = time.monotonic()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            now = time.monotonic()
+            log_stats = now - self._stats_logged_at >= self.stats_interval
+            if log_stats:
+                self._stats_logged_at = now
+        if log_stats:
+            LOGGER.info(json.dumps({"event": "certificate_cache", **asdict(self.stats())}))
+        return value
+
+    def accepts(self, size: int | None) -> bool:
+        return size is not None and size <= self.max_object_bytes
+
+    def put(self, key: str, value: bytes) -> None:
+        if not self.accepts(len(value)):
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= len(previous)
+            self._entries[key] = value
+            self._current_bytes += len(value)
+            while self._current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= len(evicted)
+                self._evictions += 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._current_bytes -= len(value)
+                self._evictions += 1
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                current_bytes=self._current_bytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+def _get_read_cache() -> _BlobReadCache | None:
+    """Return the shared read cache, or ``None`` when ``CERT_CACHE_MAX_BYTES`` is unset."""
+    global _READ_CACHE
+    if _READ_CACHE is None:
+        max_bytes = int(os.getenv("CERT_CACHE_MAX_BYTES") or 0)
+        if max_bytes <= 0:
+            return None
+        max_object_bytes = int(
+            os.getenv("CERT_CACHE_MAX_OBJECT_BYTES") or DEFAULT_CERT_CACHE_MAX_OBJECT_BYTES
+        )
+        stats_interval = float(
+            os.getenv("CERT_CACHE_STATS_INTERVAL_SECONDS") or DEFAULT_CERT_CACHE_STATS_INTERVAL_SECONDS
+        )
+        with _READ_CACHE_LOCK:
+            if _READ_CACHE is None:
+                _READ_CACHE = _BlobReadCache(max_bytes, max_object_bytes, stats_interval)
+    return _READ_CACHE
+
+
+def get_certificate_cache_stats() -> CacheStats | None:
+    cache = _get_read_cache()
+    return cache.stats() if cache else None
+
+
+def reset_certificate_cache() -> None:
+    """Drop the cache and its counters; it is rebuilt from the environment on next use."""
+    global _READ_CACHE
+    with _READ_CACHE_LOCK:
+        _READ_CACHE = None
 
 
 def _get_cert_bucket() -> str | None:
@@ -31,22 +183,121 @@ def _is_s3_enabled() -> bool:
     return _get_cert_bucket() is not None
 
 
+def get_cert_download_mode() -> str:
+    mode = os.getenv("CERT_DOWNLOAD_MODE", "proxy").strip().lower()
+    if mode not in CERT_DOWNLOAD_MODES:
+        raise RuntimeError(f"Unsupported CERT_DOWNLOAD_MODE: {mode}")
+    return mode
+
+
+def get_cert_download_url_ttl() -> int:
+    value = os.getenv("CERT_DOWNLOAD_URL_TTL_SECONDS")
+    if not value:
+        return DEFAULT_CERT_DOWNLOAD_URL_TTL_SECONDS
+    return int(value)
+
+
 def _get_s3_client():
     global _S3_CLIENT
     if _S3_CLIENT is None:
+        # boto3 costs a noticeable slice of cold start; local-disk mode never needs it.
+        import boto3
+
         _S3_CLIENT = boto3.client("s3")
     return _S3_CLIENT
 
 
-def _make_object_key(filename: str | None) -> str:
+def _make_object_key(filename: str | None, scope: str | None = None) -> str:
     suffix = Path(filename or "").suffix
     name = f"{uuid.uuid4().hex}{suffix}"
+    if scope:
+        name = f"{scope}/{name}"
     prefix = _get_cert_prefix()
     if prefix:
         return f"{prefix}/{name}"
     return name
 
 
+def get_cert_max_upload_bytes() -> int:
+    value = os.getenv("CERT_MAX_UPLOAD_BYTES")
+    if not value:
+        return DEFAULT_CERT_MAX_UPLOAD_BYTES
+    return int(value)
+
+
+def get_cert_upload_part_size() -> int:
+    value = os.getenv("CERT_UPLOAD_PART_SIZE_BYTES")
+    if not value:
+        return DEFAULT_CERT_UPLOAD_PART_SIZE
+    return max(int(value), MIN_S3_PART_SIZE)
+
+
+def get_cert_upload_concurrency() -> int:
+    value = os.getenv("CERT_UPLOAD_CONCURRENCY")
+    if not value:
+        return DEFAULT_CERT_UPLOAD_CONCURRENCY
+    return max(int(value), 1)
+
+
+def _is_fsync_enabled() -> bool:
+    return os.getenv("CERT_STORAGE_FSYNC", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def shard_path(root: Path, name: str) -> Path:
+    """Place ``name`` two hex levels deep (``ab/cd/abcd...``) under ``root``."""
+    return root / name[:2] / name[2:4] / name
+
+
+def is_sharded_path(root: Path, path: Path) -> bool:
+    return path == shard_path(root, path.name)
+
+
+def _fsync_directory(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def move_local_file(source: Path, destination: Path) -> None:
+    """Atomically move a fully written file into place."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, destination)
+    if _is_fsync_enabled():
+        _fsync_directory(destination.parent)
+
+
+def _write_local_file_atomic(destination: Path, chunks: Iterable[bytes]) -> None:
+    """Write to a temp file beside ``destination`` and rename it into place.
+
+    Readers see either the old file or the complete new one, never a partial
+    write. With ``CERT_STORAGE_FSYNC`` set the data and directory entry are
+    flushed to disk before returning.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=destination.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+            if _is_fsync_enabled():
+                output.flush()
+                os.fsync(output.fileno())
+        move_local_file(Path(temp_name), destination)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def _iter_file_chunks(file_obj) -> Iterator[bytes]:
+    while True:
+        chunk = file_obj.read(1024 * 1024)
+        if not chunk:
+            break
+        yield chunk
+
+
 def get_cert_storage_dir() -> Path:
     path_value = os.getenv("CERT_STORAGE_DIR")
     storage_dir = Path(path_value) if path_value else DEFAULT_CERT_STORAGE_DIR
@@ -60,68 +311,425 @@ def ensure_cert_storage_dir() -> Path:
     return get_cert_storage_dir()
 
 
-def save_certificate_upload(file: UploadFile) -> tuple[str, int]:
+def content_blob_path(content_sha256: str) -> str:
+    """Return where the blob with this SHA-256 lives in the active backend."""
+    if _is_s3_enabled():
+        name = f"sha256/{content_sha256}"
+        prefix = _get_cert_prefix()
+        if prefix:
+            return f"{prefix}/{name}"
+        return name
+    return str(shard_path(get_cert_storage_dir(), content_sha256))
+
+
+def preview_blob_path(name: str) -> str:
+    if _is_s3_enabled():
+        prefix = _get_cert_prefix()
+        if prefix:
+            return f"{prefix}/previews/{name}"
+        return f"previews/{name}"
+    return str(shard_path(get_cert_storage_dir() / "previews", name))
+
+
+def _staging_path() -> str:
+    if _is_s3_enabled():
+        return _make_object_key(None, scope="tmp")
+    staging_dir = get_cert_storage_dir() / "tmp"
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    return str(staging_dir / uuid.uuid4().hex)
+
+
+def hash_certificate_upload(file: UploadFile) -> tuple[int, str]:
+    """Read a spooled upload once for ``(size, sha256 hex)`` and rewind it."""
+    digest = hashlib.sha256()
+    size_bytes = 0
+    file_obj = file.file
+    while True:
+        chunk = file_obj.read(1024 * 1024)
+        if not chunk:
+            break
+        size_bytes += len(chunk)
+        digest.update(chunk)
+    file_obj.seek(0)
+    return size_bytes, digest.hexdigest()
+
+
+def write_certificate_upload(file: UploadFile, blob_path: str) -> None:
     if _is_s3_enabled():
         bucket = _get_cert_bucket()
         if not bucket:
             raise RuntimeError("CERT_STORAGE_BUCKET is not configured")
 
-        object_key = _make_object_key(file.filename)
         client = _get_s3_client()
         content_type = file.content_type or DEFAULT_CERT_CONTENT_TYPE
-        file_obj = file.file
-        file_obj.seek(0, os.SEEK_END)
-        size_bytes = file_obj.tell()
-        file_obj.seek(0)
         client.upload_fileobj(
-            file_obj,
+            file.file,
             bucket,
-            object_key,
+            blob_path,
             ExtraArgs={"ContentType": content_type},
         )
-        file_obj.close()
-        return object_key, size_bytes
-
-    storage_dir = get_cert_storage_dir()
-    suffix = Path(file.filename or "").suffix
-    filename = f"{uuid.uuid4().hex}{suffix}"
-    destination = storage_dir / filename
-    size_bytes = 0
+        file.file.close()
+        return
 
-    with destination.open("wb") as output:
-        while True:
-            chunk = file.file.read(1024 * 1024)
-            if not chunk:
-                break
-            size_bytes += len(chunk)
-            output.write(chunk)
+    _write_local_file_atomic(Path(blob_path), _iter_file_chunks(file.file))
     file.file.close()
-    return str(destination), size_bytes
 
 
-def load_certificate_bytes(blob_path: str) -> bytes:
+def write_certificate_bytes(blob_path: str, content: bytes, content_type: str) -> None:
     if _is_s3_enabled():
         bucket = _get_cert_bucket()
         if not bucket:
-            raise FileNotFoundError(blob_path)
+            raise RuntimeError("CERT_STORAGE_BUCKET is not configured")
+        client = _get_s3_client()
+        client.put_object(Bucket=bucket, Key=blob_path, Body=content, ContentType=content_type)
+        return
+
+    _write_local_file_atomic(Path(blob_path), [content])
+
+
+def promote_certificate_blob(staged_path: str, blob_path: str) -> None:
+    """Move a staged upload to its content-addressed location."""
+    if _is_s3_enabled():
+        bucket = _get_cert_bucket()
+        if not bucket:
+            raise RuntimeError("CERT_STORAGE_BUCKET is not configured")
         client = _get_s3_client()
+        client.copy_object(
+            Bucket=bucket,
+            Key=blob_path,
+            CopySource={"Bucket": bucket, "Key": staged_path},
+        )
+        client.delete_object(Bucket=bucket, Key=staged_path)
+        return
+
+    move_local_file(Path(staged_path), Path(blob_path))
+
+
+async def stream_certificate_upload(
+    chunks: AsyncIterator[bytes],
+    content_type: str | None,
+    max_bytes: int,
+) -> tuple[str, int, str]:
+    """Stage a certificate from an async byte stream without spooling it.
+
+    Returns ``(staged_path, size, sha256 hex)``; the caller moves the staged
+    blob into place with :func:`promote_certificate_blob` or deletes it.
+    Raises ``CertificateTooLargeError`` as soon as more than ``max_bytes``
+    arrive; any failure, including a client disconnect, removes the partial
+    blob.
+    """
+    if _is_s3_enabled():
+        return await _stream_to_s3(chunks, content_type or DEFAULT_CERT_CONTENT_TYPE, max_bytes)
+    return await _stream_to_local(chunks, max_bytes)
+
+
+async def _stream_to_local(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int,
+) -> tuple[str, int, str]:
+    destination = Path(_staging_path())
+    digest = hashlib.sha256()
+    size_bytes = 0
+
+    output = await asyncio.to_thread(destination.open, "wb")
+    try:
+        async for chunk in chunks:
+            size_bytes += len(chunk)
+            if size_bytes > max_bytes:
+                raise CertificateTooLargeError(max_bytes)
+            digest.update(chunk)
+            await asyncio.to_thread(output.write, chunk)
+        if size_bytes == 0:
+            raise CertificateUploadError("Certificate is empty")
+        if _is_fsync_enabled():
+            await asyncio.to_thread(output.flush)
+            await asyncio.to_thread(os.fsync, output.fileno())
+    except BaseException:
+        output.close()
+        destination.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(output.close)
+    return str(destination), size_bytes, digest.hexdigest()
+
+
+async def _stream_to_s3(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    max_bytes: int,
+) -> tuple[str, int, str]:
+    bucket = _get_cert_bucket()
+    if not bucket:
+        raise RuntimeError("CERT_STORAGE_BUCKET is not configured")
+
+    client = _get_s3_client()
+    object_key = _staging_path()
+    part_size = get_cert_upload_part_size()
+    upload = await asyncio.to_thread(
+        client.create_multipart_upload,
+        Bucket=bucket,
+        Key=object_key,
+        ContentType=content_type,
+    )
+    upload_id = upload["UploadId"]
+
+    # Each in-flight part holds a slot, so reading from the client pauses
+    # once ``concurrency`` parts are uploading and memory stays bounded.
+    slots = asyncio.Semaphore(get_cert_upload_concurrency())
+    pending: list[asyncio.Task] = []
+
+    async def _upload_part(part_number: int, body: bytes) -> dict:
         try:
-            response = client.get_object(Bucket=bucket, Key=blob_path)
-        except ClientError as error:
-            code = error.response.get("Error", {}).get("Code")
-            if code in {"NoSuchKey", "404"}:
-                raise FileNotFoundError(blob_path) from error
-            raise
-        body = response["Body"]
-        return body.read()
+            response = await asyncio.to_thread(
+                client.upload_part,
+                Bucket=bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    async def _submit(body: bytes) -> None:
+        await slots.acquire()
+        pending.append(asyncio.create_task(_upload_part(len(pending) + 1, body)))
+
+    digest = hashlib.sha256()
+    size_bytes = 0
+    buffer = bytearray()
+    try:
+        async for chunk in chunks:
+            size_bytes += len(chunk)
+            if size_bytes > max_bytes:
+                raise CertificateTooLargeError(max_bytes)
+            digest.update(chunk)
+            buffer.extend(chunk)
+            while len(buffer) >= part_size:
+                await _submit(bytes(buffer[:part_size]))
+                del buffer[:part_size]
+        if size_bytes == 0:
+            raise CertificateUploadError("Certificate is empty")
+        if buffer:
+            await _submit(bytes(buffer))
+
+        parts = await asyncio.gather(*pending)
+        await asyncio.to_thread(
+            client.complete_multipart_upload,
+            Bucket=bucket,
+            Key=object_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        # Let in-flight parts settle first so the abort also discards them.
+        await asyncio.gather(*pending, return_exceptions=True)
+        try:
+            await asyncio.to_thread(
+                client.abort_multipart_upload,
+                Bucket=bucket,
+                Key=object_key,
+                UploadId=upload_id,
+            )
+        except client.exceptions.ClientError:
+            pass
+        raise
+    return object_key, size_bytes, digest.hexdigest()
+
 
+def _get_s3_object(blob_path: str, **kwargs) -> dict:
+    bucket = _get_cert_bucket()
+    if not bucket:
+        raise FileNotFoundError(blob_path)
+    client = _get_s3_client()
+    try:
+        return client.get_object(Bucket=bucket, Key=blob_path, **kwargs)
+    except client.exceptions.ClientError as error:
+        code = error.response.get("Error", {}).get("Code")
+        if code in {"NoSuchKey", "404"}:
+            raise FileNotFoundError(blob_path) from error
+        raise
+
+
+def is_local_storage() -> bool:
+    return not _is_s3_enabled()
+
+
+def get_local_certificate_path(blob_path: str) -> Path:
     path = Path(blob_path)
-    if not path.exists():
+    if not path.is_file():
+        raise FileNotFoundError(blob_path)
+    return path
+
+
+def open_certificate_stream(
+    blob_path: str,
+    chunk_size: int = CERT_STREAM_CHUNK_SIZE,
+    byte_range: tuple[int, int] | None = None,
+) -> tuple[Iterator[bytes], int | None]:
+    """Open an S3 certificate and return ``(chunks, content_length)``.
+
+    The object is requested up front so a missing key raises
+    ``FileNotFoundError`` before any response has started; the body is then
+    read lazily one chunk at a time. ``byte_range`` is an inclusive
+    ``(start, end)`` pair.
+    """
+    cache = _get_read_cache()
+    cached = cache.get(blob_path) if cache else None
+    if cached is not None:
+        if byte_range is not None:
+            cached = cached[byte_range[0] : byte_range[1] + 1]
+        return iter([cached]), len(cached)
+
+    if byte_range is None:
+        response = _get_s3_object(blob_path)
+    else:
+        response = _get_s3_object(blob_path, Range=f"bytes={byte_range[0]}-{byte_range[1]}")
+    body = response["Body"]
+    content_length = response.get("ContentLength")
+    fill_cache = cache is not None and byte_range is None and cache.accepts(content_length)
+
+    def _iter_chunks() -> Iterator[bytes]:
+        # Small objects are collected while streaming and cached once complete.
+        collected: list[bytes] = []
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                if fill_cache:
+                    collected.append(chunk)
+                yield chunk
+        finally:
+            body.close()
+        if fill_cache:
+            cache.put(blob_path, b"".join(collected))
+
+    return _iter_chunks(), content_length
+
+
+def create_certificate_download_url(
+    blob_path: str,
+    content_type: str,
+    content_disposition: str,
+) -> str:
+    """Return a short-lived presigned GET URL for an S3 certificate.
+
+    S3 echoes the response overrides back as headers, so the browser gets the
+    same Content-Type and Content-Disposition as a proxied download.
+    """
+    bucket = _get_cert_bucket()
+    if not bucket:
+        raise RuntimeError("CERT_STORAGE_BUCKET is not configured")
+    client = _get_s3_client()
+    return client.generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": bucket,
+            "Key": blob_path,
+            "ResponseContentType": content_type,
+            "ResponseContentDisposition": content_disposition,
+        },
+        ExpiresIn=get_cert_download_url_ttl(),
+    )
+
+
+def get_certificate_upload_scope(course_id: uuid.UUID) -> str:
+    scope = f"uploads/{course_id}/"
+    prefix = _get_cert_prefix()
+    if prefix:
+        return f"{prefix}/{scope}"
+    return scope
+
+
+def create_certificate_upload_post(
+    course_id: uuid.UUID,
+    filename: str,
+    content_type: str,
+    content_sha256: str,
+) -> tuple[str, dict[str, str], str, int]:
+    """Presign a browser POST straight into the certificate bucket.
+
+    The policy pins the object key, Content-Type and SHA-256 checksum and caps
+    the body at ``get_cert_max_upload_bytes()``. S3 rejects a body that does
+    not match the checksum and keeps it on the object, so completion reads the
+    hash from a HEAD instead of downloading the upload.
+    Returns ``(url, fields, key, expires_in)``.
+    """
+    bucket = _get_cert_bucket()
+    if not bucket:
+        raise RuntimeError("CERT_STORAGE_BUCKET is not configured")
+
+    object_key = _make_object_key(filename, scope=f"uploads/{course_id}")
+    expires_in = DEFAULT_CERT_UPLOAD_URL_TTL_SECONDS
+    checksum = base64.b64encode(bytes.fromhex(content_sha256)).decode()
+    client = _get_s3_client()
+    presigned = client.generate_presigned_post(
+        Bucket=bucket,
+        Key=object_key,
+        Fields={
+            "Content-Type": content_type,
+            "x-amz-checksum-algorithm": "SHA256",
+            "x-amz-checksum-sha256": checksum,
+        },
+        Conditions=[
+            {"Content-Type": content_type},
+            {"x-amz-checksum-algorithm": "SHA256"},
+            {"x-amz-checksum-sha256": checksum},
+            ["content-length-range", 1, get_cert_max_upload_bytes()],
+        ],
+        ExpiresIn=expires_in,
+    )
+    return presigned["url"], presigned["fields"], object_key, expires_in
+
+
+def head_certificate_object(blob_path: str) -> dict:
+    bucket = _get_cert_bucket()
+    if not bucket:
         raise FileNotFoundError(blob_path)
-    return path.read_bytes()
+    client = _get_s3_client()
+    try:
+        return client.head_object(Bucket=bucket, Key=blob_path, ChecksumMode="ENABLED")
+    except client.exceptions.ClientError as error:
+        code = error.response.get("Error", {}).get("Code")
+        if code in {"NoSuchKey", "404", "NotFound"}:
+            raise FileNotFoundError(blob_path) from error
+        raise
+
+
+def object_content_sha256(head: dict) -> str | None:
+    """Return the hex SHA-256 S3 verified on upload, if ``head`` carries one."""
+    checksum = head.get("ChecksumSHA256")
+    # Multipart objects report a checksum of part checksums ("...-N").
+    if not checksum or "-" in checksum:
+        return None
+    return base64.b64decode(checksum).hex()
+
+
+def load_certificate_bytes(blob_path: str) -> bytes:
+    cache = _get_read_cache()
+    if cache:
+        cached = cache.get(blob_path)
+        if cached is not None:
+            return cached
+
+    if _is_s3_enabled():
+        response = _get_s3_object(blob_path)
+        body = response["Body"]
+        content = body.read()
+    else:
+        path = Path(blob_path)
+        if not path.exists():
+            raise FileNotFoundError(blob_path)
+        content = path.read_bytes()
+
+    if cache:
+        cache.put(blob_path, content)
+    return content
 
 
 def delete_certificate_blob(blob_path: str) -> None:
+    cache = _get_read_cache()
+    if cache:
+        cache.discard(blob_path)
+
     if _is_s3_enabled():
         bucket = _get_cert_bucket()
         if not bucket:
@@ -129,7 +737,7 @@ def delete_certificate_blob(blob_path: str) -> None:
         client = _get_s3_client()
         try:
             client.delete_object(Bucket=bucket, Key=blob_path)
-        except ClientError:
+        except client.exceptions.ClientError:
             return
         return
 
@@ -137,3 +745,104 @@ def delete_certificate_blob(blob_path: str) -> None:
         Path(blob_path).unlink(missing_ok=True)
     except OSError:
         pass
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    blob_path: str
+    size_bytes: int
+    modified_at: datetime
+
+
+def get_storage_area_prefix(area: str | None = None) -> str:
+    """Return the string every blob path under ``area`` starts with."""
+    if _is_s3_enabled():
+        parts = [part for part in (_get_cert_prefix(), area) if part]
+        return "".join(f"{part}/" for part in parts)
+    root = get_cert_storage_dir()
+    return f"{root / area if area else root}/"
+
+
+def _iter_local_tree(directory: Path) -> Iterator[Path]:
+    # Directories sort as "name/" so the walk yields full paths in string order.
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda entry: entry.name + "/" if entry.is_dir() else entry.name)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _iter_local_tree(Path(entry.path))
+        elif entry.is_file(follow_symlinks=False):
+            yield Path(entry.path)
+
+
+def iter_stored_blobs(area: str | None = None) -> Iterator[StoredBlob]:
+    """Yield every stored object, sorted by blob path in byte order.
+
+    ``area`` limits the listing to one top-level area such as ``previews``.
+    The listing is paged from S3 or walked from disk lazily, never loaded
+    whole.
+    """
+    if _is_s3_enabled():
+        paginator = _get_s3_client().get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=_get_cert_bucket(), Prefix=get_storage_area_prefix(area))
+        for page in pages:
+            for item in page.get("Contents", []):
+                yield StoredBlob(item["Key"], item["Size"], item["LastModified"])
+        return
+
+    root = get_cert_storage_dir()
+    for path in _iter_local_tree(root / area if area else root):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        modified_at = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        yield StoredBlob(str(path), stat.st_size, modified_at)
+
+
+def _unlink_local(blob_path: str) -> bool:
+    try:
+        Path(blob_path).unlink(missing_ok=True)
+    except OSError:
+        return False
+    return True
+
+
+def delete_certificate_blobs(
+    blob_paths: Sequence[str],
+    workers: int = DEFAULT_LOCAL_DELETE_WORKERS,
+) -> list[str]:
+    """Delete many blobs at once and return the paths that could not be deleted.
+
+    S3 keys go out in ``DeleteObjects`` calls of up to 1000 keys; local files
+    are unlinked from a small thread pool.
+    """
+    cache = _get_read_cache()
+    if cache:
+        for blob_path in blob_paths:
+            cache.discard(blob_path)
+    if not blob_paths:
+        return []
+
+    if not _is_s3_enabled():
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            deleted = pool.map(_unlink_local, blob_paths)
+            return [path for path, ok in zip(blob_paths, deleted) if not ok]
+
+    bucket = _get_cert_bucket()
+    client = _get_s3_client()
+    failed: list[str] = []
+    for start in range(0, len(blob_paths), S3_DELETE_BATCH_SIZE):
+        batch = blob_paths[start : start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+        except client.exceptions.ClientError:
+            failed.extend(batch)
+            continue
+        failed.extend(error["Key"] for error in response.get("Errors", []))
+    return failed
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date
+from typing import List, Optional
+
+from fastapi import Response
+
+from ce_api.db.session import get_engine, get_sessionmaker
+from ce_api.deps import find_user_by_external_id, prefetch_jwks
+from ce_api.models import User
+from ce_api.routers.allocations import list_allocations
+from ce_api.routers.courses import list_courses
+from ce_api.routers.cycles import list_cycles
+from ce_api.routers.progress import get_progress
+from ce_api.routers.state_licenses import list_state_licenses
+from ce_api.routers.timeline import get_timeline
+from ce_api.schemas import ReadinessOut, WarmupStepOut
+
+LOGGER = logging.getLogger(__name__)
+
+# Owns no rows, so the warm-up queries return nothing.
+WARMUP_USER_ID = uuid.UUID(int=0)
+# Failed steps are retried with doubling delays between these bounds.
+WARMUP_RETRY_INITIAL_SECONDS = 1.0
+WARMUP_RETRY_MAX_SECONDS = 60.0
+
+
+class Warmup:
+    """Outcome of the startup warm-up, read by ``/readyz``.
+
+    Steps that fail are retried in the background with backoff until they
+    succeed or the app shuts down, so a transient error only delays
+    readiness instead of failing the instance for good.
+    """
+
+    def __init__(self) -> None:
+        self.done = False
+        self.steps: List[WarmupStepOut] = []
+        self.retry_initial = WARMUP_RETRY_INITIAL_SECONDS
+        self.retry_max = WARMUP_RETRY_MAX_SECONDS
+        self._stopped = threading.Event()
+
+    def report(self) -> ReadinessOut:
+        steps = list(self.steps)
+        if any(step.status == "failed" for step in steps):
+            status = "failed"
+        elif not self.done:
+            status = "warming"
+        else:
+            status = "ready"
+        return ReadinessOut(status=status, steps=steps)
+
+    def run(self) -> None:
+        pending = [
+            ("db_pool", _open_pool_connections),
+            ("jwks", _prefetch_jwks),
+            ("hot_queries", _run_hot_queries),
+        ]
+        delay = self.retry_initial
+        while True:
+            pending = [(name, action) for name, action in pending if not self._step(name, action)]
+            if not pending:
+                self.done = True
+                return
+            if self._stopped.wait(delay):
+                return
+            delay = min(delay * 2, self.retry_max)
+
+    def stop(self) -> None:
+        """Abandon any pending retries."""
+        self._stopped.set()
+
+    def _step(self, name: str, action: Callable[[], Optional[str]]) -> bool:
+        started = time.perf_counter()
+        try:
+            detail = action()
+            status = "skipped" if detail is None else "ok"
+        except Exception as error:
+            LOGGER.exception("Warm-up step '%s' failed", name)
+            status, detail = "failed", f"{type(error).__name__}: {error}"
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        previous = next((step for step in self.steps if step.name == name), None)
+        step = WarmupStepOut(
+            name=name,
+            status=status,
+            duration_ms=duration_ms,
+            attempts=previous.attempts + 1 if previous else 1,
+            detail=detail,
+        )
+        # Replace rather than mutate so report() never sees a half-built list.
+        if previous:
+            self.steps = [step if item.name == name else item for item in self.steps]
+        else:
+            self.steps = [*self.steps, step]
+        return status != "failed"
+
+
+def _get_warmup_connection_count(pool_size: int) -> int:
+    value = os.getenv("DB_WARMUP_CONNECTIONS")
+    if not value:
+        return pool_size
+    return int(value)
+
+
+def _open_pool_connections() -> str:
+    engine = get_engine()
+    count = _get_warmup_connection_count(engine.pool.size())
+    # Hold them all at once so the pool ends up with ``count`` idle connections.
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+    return f"{count} connections"
+
+
+def _prefetch_jwks() -> Optional[str]:
+    key_count = prefetch_jwks()
+    if key_count is None:
+        return None
+    return f"{key_count} keys"
+
+
+def _run_hot_queries() -> str:
+    """Run the auth lookup and the list endpoints for a user with no rows.
+
+    Going through the real handlers fills SQLAlchemy's compiled statement
+    cache with exactly the statements live requests will issue.
+    """
+    user = User(id=WARMUP_USER_ID, external_user_id="")
+    today = date.today()
+    with get_sessionmaker()() as session:
+        find_user_by_external_id(session, user.external_user_id)
+        list_state_licenses(session=session, current_user=user)
+        list_cycles(
+            Response(),
+            state_license_id=None,
+            limit=None,
+            cursor=None,
+            session=session,
+            current_user=user,
+        )
+        list_courses(
+            Response(),
+            from_date=None,
+            to_date=None,
+            limit=None,
+            cursor=None,
+            session=session,
+            current_user=user,
+        )
+        list_allocations(
+            Response(),
+            course_id=None,
+            cycle_id=None,
+            limit=None,
+            cursor=None,
+            session=session,
+            current_user=user,
+        )
+        get_progress(session=session, current_user=user, today=today)
+        get_timeline(session=session, current_user=user, today=today, from_date=None, to_date=None)
+        session.rollback()
+    return "7 statements"
@@ -1,6 +1,8 @@
 import os
+from collections.abc import Callable
 from pathlib import Path
 
+import httpx
 import pytest
 import sqlalchemy as sa
 from fastapi.testclient import TestClient
@@ -8,10 +10,12 @@ from sqlalchemy.orm import Session
 
 from ce_api.db.session import get_db_session, get_sessionmaker
 from ce_api.main import app
+from ce_api.request_timing import QUERY_COUNT_HEADER, ServerTimingMiddleware
 
 TABLES = [
     "credit_allocations",
     "certificates",
+    "certificate_blobs",
     "course_credits",
     "license_cycles",
     "state_licenses",
@@ -56,3 +60,29 @@ def client(db_session: Session) -> TestClient:
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def timed_client(db_session: Session) -> TestClient:
+    """Like ``client``, but responses carry the timing and query-count headers."""
+
+    def override_db_session():
+        yield db_session
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    with TestClient(ServerTimingMiddleware(app)) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def query_budget(timed_client: TestClient) -> Callable[..., httpx.Response]:
+    """Send a request and fail if it issues more SQL statements than ``budget``."""
+
+    def _request(method: str, url: str, budget: int, **kwargs) -> httpx.Response:
+        resp = timed_client.request(method, url, **kwargs)
+        count = int(resp.headers[QUERY_COUNT_HEADER.decode()])
+        assert count <= budget, f"{method} {url} issued {count} SQL statements; budget is {budget}"
+        return resp
+
+    return _request
@@ -71,3 +71,52 @@ def test_allocation_requires_owned_cycle(client: TestClient) -> None:
     payload = {"course_id": course_id, "cycle_ids": [cycle_id]}
     resp = client.post("/api/allocations/bulk", json=payload, headers=headers_user2)
     assert resp.status_code == 404
+
+
+def test_bulk_allocations_accept_course_cycle_matrix(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+    cycle1 = _create_cycle(client, headers, state_license_id, "2023-01-01", "2023-06-30")
+    cycle2 = _create_cycle(client, headers, state_license_id, "2023-07-01", "2023-12-31")
+    course1 = _create_course(client, headers)
+    course2 = _create_course(client, headers)
+
+    payload = {"course_ids": [course1, course2], "cycle_ids": [cycle1, cycle2]}
+    first = client.post("/api/allocations/bulk", json=payload, headers=headers)
+    assert first.status_code == 201
+    assert {
+        (item["course_credit_id"], item["license_cycle_id"]) for item in first.json()["created"]
+    } == {(course1, cycle1), (course1, cycle2), (course2, cycle1), (course2, cycle2)}
+    assert first.json()["skipped"] == []
+
+    second = client.post(
+        "/api/allocations/bulk",
+        json={"course_id": course1, "course_ids": [course2], "cycle_ids": [cycle1]},
+        headers=headers,
+    )
+    assert second.status_code == 201
+    assert second.json()["created"] == []
+    assert len(second.json()["skipped"]) == 2
+    assert second.json()["skipped_cycle_ids"] == [cycle1]
+
+    missing = client.post("/api/allocations/bulk", json={"cycle_ids": [cycle1]}, headers=headers)
+    assert missing.status_code == 422
+
+
+def test_delete_allocation_requires_owner(client: TestClient) -> None:
+    headers_user1 = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    headers_user2 = {"X-MS-CLIENT-PRINCIPAL-ID": "user-2"}
+    state_license_id = _create_state_license(client, headers_user1)
+    _create_cycle(client, headers_user1, state_license_id, "2024-01-01", "2024-12-31")
+    _create_course(client, headers_user1)
+
+    allocations = client.get("/api/allocations", headers=headers_user1)
+    assert len(allocations.json()) == 1
+    allocation_id = allocations.json()[0]["id"]
+
+    assert client.get("/api/allocations", headers=headers_user2).json() == []
+    other = client.delete(f"/api/allocations/{allocation_id}", headers=headers_user2)
+    assert other.status_code == 404
+
+    own = client.delete(f"/api/allocations/{allocation_id}", headers=headers_user1)
+    assert own.status_code == 204
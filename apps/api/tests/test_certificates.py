@@ -1,7 +1,29 @@
+import base64
+import hashlib
+import io
+import json
+import logging
 import os
+from datetime import timedelta
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
 
+import boto3
+import pytest
+import requests
 from fastapi.testclient import TestClient
+from moto import mock_aws
+from PIL import Image
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from ce_api import storage
+from ce_api.routers import courses as courses_router
+from ce_api.models import Certificate, CertificateBlob, CourseCredit, CreditAllocation
+from ce_api.previews import certificate_preview_path
+from ce_api.scripts.reconcile_storage import reconcile_storage
+from ce_api.scripts.reshard_storage import reshard_blob_paths
+from ce_api.storage import stream_certificate_upload
 
 
 def _create_course(client: TestClient, headers: dict) -> str:
@@ -35,11 +57,662 @@ def test_certificate_upload_download_delete(client: TestClient) -> None:
     download = client.get(f"/api/certificates/{cert_id}/download", headers=headers)
     assert download.status_code == 200
     assert download.content == file_content
+    assert download.headers["content-length"] == str(len(file_content))
+    assert download.headers["content-disposition"] == 'attachment; filename="cert.txt"'
 
     delete = client.delete(f"/api/certificates/{cert_id}", headers=headers)
     assert delete.status_code == 204
-    assert not Path(blob_path).exists()
+    # The file outlives its row until the reconciler collects it.
+    assert Path(blob_path).exists()
 
     list_resp = client.get(f"/api/courses/{course_id}/certificates", headers=headers)
     assert list_resp.status_code == 200
     assert list_resp.json() == []
+
+
+@pytest.fixture()
+def s3_bucket(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("CERT_STORAGE_BUCKET", "certs")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="certs")
+        monkeypatch.setattr(storage, "_S3_CLIENT", client)
+        yield client
+
+
+@pytest.fixture()
+def read_cache(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("CERT_CACHE_MAX_BYTES", str(1024 * 1024))
+    storage.reset_certificate_cache()
+    yield
+    storage.reset_certificate_cache()
+
+
+def _create_s3_certificate(
+    client: TestClient,
+    db_session: Session,
+    s3_bucket,
+    headers: dict,
+    file_content: bytes,
+) -> Certificate:
+    course_id = _create_course(client, headers)
+    course = db_session.get(CourseCredit, course_id)
+    s3_bucket.put_object(Bucket="certs", Key="certs/scan.pdf", Body=file_content)
+    certificate = Certificate(
+        user_id=course.user_id,
+        course_credit_id=course.id,
+        filename="scan.pdf",
+        content_type="application/pdf",
+        blob_path="certs/scan.pdf",
+        size_bytes=len(file_content),
+    )
+    db_session.add(certificate)
+    db_session.commit()
+    return certificate
+
+
+def test_certificate_download_streams_from_s3(
+    client: TestClient, db_session: Session, s3_bucket
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    file_content = b"x" * (200 * 1024)
+    certificate = _create_s3_certificate(client, db_session, s3_bucket, headers, file_content)
+
+    download = client.get(f"/api/certificates/{certificate.id}/download", headers=headers)
+    assert download.status_code == 200
+    assert download.content == file_content
+    assert download.headers["content-length"] == str(len(file_content))
+    assert download.headers["content-type"] == "application/pdf"
+
+
+def test_certificate_download_redirects_to_presigned_url(
+    client: TestClient,
+    db_session: Session,
+    s3_bucket,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("CERT_DOWNLOAD_MODE", "redirect")
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    certificate = _create_s3_certificate(client, db_session, s3_bucket, headers, b"pdf")
+
+    download = client.get(
+        f"/api/certificates/{certificate.id}/download",
+        headers=headers,
+        follow_redirects=False,
+    )
+    assert download.status_code == 302
+    assert download.headers["cache-control"] == "private, no-store"
+
+    location = urlparse(download.headers["location"])
+    query = parse_qs(location.query)
+    assert location.path.endswith("/certs/scan.pdf")
+    assert query["response-content-disposition"] == ['attachment; filename="scan.pdf"']
+    assert query["response-content-type"] == ["application/pdf"]
+
+    other = client.get(
+        f"/api/certificates/{certificate.id}/download",
+        headers={"X-MS-CLIENT-PRINCIPAL-ID": "user-2"},
+        follow_redirects=False,
+    )
+    assert other.status_code == 404
+
+
+def test_certificate_direct_upload_handshake(client: TestClient, s3_bucket, read_cache) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+
+    content_sha256 = hashlib.sha256(b"pdf").hexdigest()
+    ticket = client.post(
+        f"/api/courses/{course_id}/certificates/upload-url",
+        json={
+            "filename": "scan.pdf",
+            "content_type": "application/pdf",
+            "size_bytes": 3,
+            "content_sha256": content_sha256,
+        },
+        headers=headers,
+    )
+    assert ticket.status_code == 201
+    body = ticket.json()
+    assert body["fields"]["Content-Type"] == "application/pdf"
+    assert body["fields"]["x-amz-checksum-algorithm"] == "SHA256"
+    assert body["fields"]["x-amz-checksum-sha256"] == base64.b64encode(bytes.fromhex(content_sha256)).decode()
+    assert body["blob_path"].startswith(f"uploads/{course_id}/")
+
+    posted = requests.post(
+        body["url"],
+        data=body["fields"],
+        files={"file": ("scan.pdf", b"pdf", "application/pdf")},
+        timeout=5,
+    )
+    assert posted.status_code in {200, 204}
+    # moto neither verifies nor stores the checksum on a POST; store it the way S3 would.
+    s3_bucket.put_object(
+        Bucket="certs",
+        Key=body["blob_path"],
+        Body=b"pdf",
+        ContentType="application/pdf",
+        ChecksumAlgorithm="SHA256",
+    )
+
+    other_course_id = _create_course(client, {"X-MS-CLIENT-PRINCIPAL-ID": "user-2"})
+    stolen = client.post(
+        f"/api/courses/{other_course_id}/certificates/complete",
+        json={"blob_path": body["blob_path"], "filename": "scan.pdf"},
+        headers={"X-MS-CLIENT-PRINCIPAL-ID": "user-2"},
+    )
+    assert stolen.status_code == 404
+
+    complete = client.post(
+        f"/api/courses/{course_id}/certificates/complete",
+        json={"blob_path": body["blob_path"], "filename": "scan.pdf"},
+        headers=headers,
+    )
+    assert complete.status_code == 201
+    assert complete.json()["size_bytes"] == 3
+    assert complete.json()["content_type"] == "application/pdf"
+
+    assert complete.json()["blob_path"] == f"sha256/{content_sha256}"
+
+    again = client.post(
+        f"/api/courses/{course_id}/certificates/complete",
+        json={"blob_path": body["blob_path"], "filename": "scan.pdf"},
+        headers=headers,
+    )
+    assert again.status_code == 404
+
+    missing = client.post(
+        f"/api/courses/{course_id}/certificates/complete",
+        json={"blob_path": f"uploads/{course_id}/missing.pdf", "filename": "scan.pdf"},
+        headers=headers,
+    )
+    assert missing.status_code == 404
+
+    unverified_path = f"uploads/{course_id}/unverified.pdf"
+    s3_bucket.put_object(Bucket="certs", Key=unverified_path, Body=b"pdf")
+    unverified = client.post(
+        f"/api/courses/{course_id}/certificates/complete",
+        json={"blob_path": unverified_path, "filename": "scan.pdf"},
+        headers=headers,
+    )
+    assert unverified.status_code == 422
+    assert "Contents" not in s3_bucket.list_objects_v2(Bucket="certs", Prefix=unverified_path)
+
+    too_large = client.post(
+        f"/api/courses/{course_id}/certificates/upload-url",
+        json={
+            "filename": "big.pdf",
+            "content_type": "application/pdf",
+            "size_bytes": 10**9,
+            "content_sha256": content_sha256,
+        },
+        headers=headers,
+    )
+    assert too_large.status_code == 413
+    # Completing an upload never reads the staged object, so nothing lands in the cache.
+    stats = storage.get_certificate_cache_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (0, 0, 0)
+
+
+def test_certificate_download_etag_and_range_local(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    file_content = b"hello certificate"
+    files = {"file": ("cert.txt", file_content, "text/plain")}
+    upload = client.post(f"/api/courses/{course_id}/certificates", files=files, headers=headers)
+    cert_id = upload.json()["id"]
+    etag = f'"{hashlib.sha256(file_content).hexdigest()}"'
+    assert upload.json()["content_sha256"] == hashlib.sha256(file_content).hexdigest()
+
+    download = client.get(f"/api/certificates/{cert_id}/download", headers=headers)
+    assert download.headers["etag"] == etag
+    assert "immutable" in download.headers["cache-control"]
+
+    cached = client.get(
+        f"/api/certificates/{cert_id}/download",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    partial = client.get(
+        f"/api/certificates/{cert_id}/download",
+        headers={**headers, "Range": "bytes=6-"},
+    )
+    assert partial.status_code == 206
+    assert partial.content == b"certificate"
+    assert partial.headers["content-range"] == f"bytes 6-16/{len(file_content)}"
+
+
+def test_certificate_download_range_from_s3(
+    client: TestClient, db_session: Session, s3_bucket
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    file_content = bytes(range(256)) * 4
+    certificate = _create_s3_certificate(client, db_session, s3_bucket, headers, file_content)
+    certificate.content_sha256 = hashlib.sha256(file_content).hexdigest()
+    db_session.commit()
+    url = f"/api/certificates/{certificate.id}/download"
+
+    partial = client.get(url, headers={**headers, "Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == file_content[100:200]
+    assert partial.headers["content-length"] == "100"
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(file_content)}"
+
+    suffix = client.get(url, headers={**headers, "Range": "bytes=-24"})
+    assert suffix.status_code == 206
+    assert suffix.content == file_content[-24:]
+
+    stale = client.get(url, headers={**headers, "Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == file_content
+
+    beyond = client.get(url, headers={**headers, "Range": "bytes=5000-"})
+    assert beyond.status_code == 416
+    assert beyond.headers["content-range"] == f"bytes */{len(file_content)}"
+
+    cached = client.get(url, headers={**headers, "If-None-Match": f'W/"{certificate.content_sha256}"'})
+    assert cached.status_code == 304
+
+
+def test_certificate_stream_upload_local(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    file_content = b"streamed certificate"
+
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates/stream",
+        params={"filename": "cert.txt"},
+        content=file_content,
+        headers={**headers, "Content-Type": "text/plain"},
+    )
+    assert upload.status_code == 201
+    body = upload.json()
+    assert body["size_bytes"] == len(file_content)
+    assert body["content_sha256"] == hashlib.sha256(file_content).hexdigest()
+    assert Path(body["blob_path"]).read_bytes() == file_content
+
+    monkeypatch.setenv("CERT_MAX_UPLOAD_BYTES", "8")
+    too_large = client.post(
+        f"/api/courses/{course_id}/certificates/stream",
+        params={"filename": "cert.txt"},
+        content=file_content,
+        headers=headers,
+    )
+    assert too_large.status_code == 413
+
+
+def test_certificate_stream_upload_holds_no_transaction_while_streaming(
+    client: TestClient,
+    db_session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+    _cert_storage_dir: Path,
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    in_transaction = []
+
+    async def _delete_course_while_streaming(chunks, content_type, max_bytes):
+        in_transaction.append(db_session.in_transaction())
+        staged = await stream_certificate_upload(chunks, content_type, max_bytes)
+        db_session.execute(delete(CreditAllocation).where(CreditAllocation.course_credit_id == course_id))
+        db_session.execute(delete(CourseCredit).where(CourseCredit.id == course_id))
+        db_session.commit()
+        return staged
+
+    monkeypatch.setattr(courses_router, "stream_certificate_upload", _delete_course_while_streaming)
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates/stream",
+        params={"filename": "cert.txt"},
+        content=b"streamed certificate",
+        headers=headers,
+    )
+    assert in_transaction == [False]
+    assert upload.status_code == 404
+    assert [path for path in _cert_storage_dir.rglob("*") if path.is_file()] == []
+
+
+def test_certificate_stream_upload_s3_multipart(
+    client: TestClient, s3_bucket, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("CERT_UPLOAD_PART_SIZE_BYTES", str(5 * 1024 * 1024))
+    monkeypatch.setenv("CERT_UPLOAD_CONCURRENCY", "2")
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    file_content = os.urandom(11 * 1024 * 1024)
+
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates/stream",
+        params={"filename": "scan.pdf"},
+        content=file_content,
+        headers={**headers, "Content-Type": "application/pdf"},
+    )
+    assert upload.status_code == 201
+    blob_path = upload.json()["blob_path"]
+    stored = s3_bucket.get_object(Bucket="certs", Key=blob_path)
+    assert stored["ContentType"] == "application/pdf"
+    assert stored["Body"].read() == file_content
+    assert upload.json()["content_sha256"] == hashlib.sha256(file_content).hexdigest()
+
+    monkeypatch.setenv("CERT_MAX_UPLOAD_BYTES", str(6 * 1024 * 1024))
+
+    def _chunks():
+        yield file_content[: 5 * 1024 * 1024]
+        yield file_content[5 * 1024 * 1024 :]
+
+    too_large = client.post(
+        f"/api/courses/{course_id}/certificates/stream",
+        params={"filename": "scan.pdf"},
+        content=_chunks(),
+        headers=headers,
+    )
+    assert too_large.status_code == 413
+    assert s3_bucket.list_multipart_uploads(Bucket="certs").get("Uploads", []) == []
+
+
+def test_duplicate_certificate_uploads_share_one_blob(
+    client: TestClient, db_session: Session
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    first_course = _create_course(client, headers)
+    second_course = _create_course(client, headers)
+    file_content = b"same certificate"
+
+    first = client.post(
+        f"/api/courses/{first_course}/certificates",
+        files={"file": ("cert.pdf", file_content, "application/pdf")},
+        headers=headers,
+    )
+    second = client.post(
+        f"/api/courses/{second_course}/certificates/stream",
+        params={"filename": "copy.pdf"},
+        content=file_content,
+        headers=headers,
+    )
+    assert first.status_code == 201
+    assert second.status_code == 201
+    blob_path = first.json()["blob_path"]
+    assert second.json()["blob_path"] == blob_path
+    assert Path(blob_path).name == hashlib.sha256(file_content).hexdigest()
+
+    blob = db_session.get(CertificateBlob, hashlib.sha256(file_content).hexdigest())
+    assert blob.ref_count == 2
+
+    client.delete(f"/api/certificates/{first.json()['id']}", headers=headers)
+    db_session.expire_all()
+    assert db_session.get(CertificateBlob, blob.sha256).ref_count == 1
+    assert Path(blob_path).exists()
+
+    client.delete(f"/api/courses/{second_course}", headers=headers)
+    db_session.expire_all()
+    assert db_session.get(CertificateBlob, blob.sha256) is None
+    assert Path(blob_path).exists()
+
+    assert reconcile_storage(db_session, min_age=timedelta(0)).deleted == 1
+    assert not Path(blob_path).exists()
+
+
+def test_certificate_preview_is_downscaled_and_cached(client: TestClient, db_session: Session) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    photo = io.BytesIO()
+    Image.new("RGB", (2400, 1800), color=(200, 120, 40)).save(photo, format="JPEG")
+
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates",
+        files={"file": ("photo.jpg", photo.getvalue(), "image/jpeg")},
+        headers=headers,
+    )
+    cert_id = upload.json()["id"]
+    blob_path = Path(upload.json()["blob_path"])
+
+    preview = client.get(f"/api/certificates/{cert_id}/preview", headers=headers)
+    assert preview.status_code == 200
+    assert preview.headers["content-type"] == "image/webp"
+    assert "immutable" in preview.headers["cache-control"]
+    with Image.open(io.BytesIO(preview.content)) as rendered:
+        assert max(rendered.size) == 480
+    cached = list(blob_path.parents[2].glob("previews/**/*.webp"))
+    assert len(cached) == 1
+
+    revalidated = client.get(
+        f"/api/certificates/{cert_id}/preview",
+        headers={**headers, "If-None-Match": preview.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+    client.delete(f"/api/certificates/{cert_id}", headers=headers)
+    assert cached[0].exists()
+    assert reconcile_storage(db_session, min_age=timedelta(0)).deleted == 2
+    assert not cached[0].exists() and not blob_path.exists()
+
+
+def test_certificate_preview_rejects_non_images(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates",
+        files={"file": ("cert.pdf", b"%PDF-1.4", "application/pdf")},
+        headers=headers,
+    )
+    preview = client.get(f"/api/certificates/{upload.json()['id']}/preview", headers=headers)
+    assert preview.status_code == 415
+
+
+def test_uploads_are_sharded_without_leftover_temp_files(
+    client: TestClient, _cert_storage_dir: Path
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates",
+        files={"file": ("cert.pdf", b"sharded", "application/pdf")},
+        headers=headers,
+    )
+    content_sha256 = hashlib.sha256(b"sharded").hexdigest()
+    expected = _cert_storage_dir / content_sha256[:2] / content_sha256[2:4] / content_sha256
+    assert upload.json()["blob_path"] == str(expected)
+    assert [path for path in _cert_storage_dir.rglob("*") if path.is_file()] == [expected]
+
+
+def test_reshard_moves_flat_blobs_and_updates_rows(
+    client: TestClient, db_session: Session, _cert_storage_dir: Path
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course = db_session.get(CourseCredit, _create_course(client, headers))
+    flat_paths = []
+    for name in ("0a1b2c3d.pdf", "ffee0011.pdf"):
+        path = _cert_storage_dir / name
+        path.write_bytes(name.encode())
+        flat_paths.append(path)
+        db_session.add(
+            Certificate(
+                user_id=course.user_id,
+                course_credit_id=course.id,
+                filename=name,
+                blob_path=str(path),
+            )
+        )
+    db_session.commit()
+
+    assert reshard_blob_paths(db_session, _cert_storage_dir, batch_size=1, dry_run=True) == (2, 0)
+    assert all(path.exists() for path in flat_paths)
+
+    assert reshard_blob_paths(db_session, _cert_storage_dir, batch_size=1) == (2, 0)
+    db_session.expire_all()
+    blob_paths = sorted(
+        db_session.scalars(
+            select(Certificate.blob_path).where(Certificate.course_credit_id == course.id)
+        ).all()
+    )
+    assert blob_paths == [
+        str(_cert_storage_dir / "0a" / "1b" / "0a1b2c3d.pdf"),
+        str(_cert_storage_dir / "ff" / "ee" / "ffee0011.pdf"),
+    ]
+    assert Path(blob_paths[0]).read_bytes() == b"0a1b2c3d.pdf"
+    assert not any(path.exists() for path in flat_paths)
+    assert reshard_blob_paths(db_session, _cert_storage_dir) == (0, 0)
+
+
+def test_repeat_s3_downloads_are_served_from_read_cache(
+    client: TestClient, db_session: Session, s3_bucket, read_cache
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    file_content = b"cached" * 1000
+    certificate = _create_s3_certificate(client, db_session, s3_bucket, headers, file_content)
+    url = f"/api/certificates/{certificate.id}/download"
+
+    assert client.get(url, headers=headers).content == file_content
+    s3_bucket.delete_object(Bucket="certs", Key="certs/scan.pdf")
+
+    assert client.get(url, headers=headers).content == file_content
+    ranged = client.get(url, headers={**headers, "Range": "bytes=0-5"})
+    assert ranged.status_code == 206
+    assert ranged.content == b"cached"
+    stats = storage.get_certificate_cache_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+
+    storage.delete_certificate_blobs([certificate.blob_path])
+    stats = storage.get_certificate_cache_stats()
+    assert (stats.entries, stats.current_bytes, stats.evictions) == (0, 0, 1)
+
+
+def test_read_cache_is_bounded_by_total_and_object_bytes() -> None:
+    cache = storage._BlobReadCache(max_bytes=10, max_object_bytes=6)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    cache.put("big", b"x" * 7)
+    assert cache.get("a") == b"aaaa"
+
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("big") is None
+    assert cache.stats() == storage.CacheStats(
+        hits=2, misses=2, evictions=1, entries=2, current_bytes=8, max_bytes=10
+    )
+
+
+def test_read_cache_logs_its_counters(caplog: pytest.LogCaptureFixture) -> None:
+    cache = storage._BlobReadCache(max_bytes=10, max_object_bytes=6, stats_interval=0)
+    cache.put("a", b"aaaa")
+    with caplog.at_level(logging.INFO, logger="ce_api.storage"):
+        cache.get("a")
+        cache.get("missing")
+
+    logged = [json.loads(record.getMessage()) for record in caplog.records]
+    assert logged[-1] == {
+        "event": "certificate_cache",
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "entries": 1,
+        "current_bytes": 4,
+        "max_bytes": 10,
+    }
+
+
+def test_reconcile_deletes_old_unreferenced_local_files(
+    client: TestClient, db_session: Session, _cert_storage_dir: Path
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    photo = io.BytesIO()
+    Image.new("RGB", (64, 64)).save(photo, format="PNG")
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates",
+        files={"file": ("photo.png", photo.getvalue(), "image/png")},
+        headers=headers,
+    )
+    live_blob = Path(upload.json()["blob_path"])
+    client.get(f"/api/certificates/{upload.json()['id']}/preview", headers=headers)
+    live_preview = Path(certificate_preview_path(upload.json()["content_sha256"]))
+
+    orphans = [
+        storage.shard_path(_cert_storage_dir, "ab" * 32),
+        _cert_storage_dir / "tmp" / "abandoned",
+        Path(certificate_preview_path("cd" * 32)),
+    ]
+    recent = _cert_storage_dir / "tmp" / "in-flight"
+    for path in [*orphans, recent]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"orphan")
+    for path in [*orphans, live_blob, live_preview]:
+        os.utime(path, (0, 0))
+
+    dry_run = reconcile_storage(db_session, dry_run=True)
+    assert (dry_run.scanned, dry_run.orphaned, dry_run.too_recent, dry_run.deleted) == (6, 3, 1, 0)
+    assert all(path.exists() for path in orphans)
+
+    result = reconcile_storage(db_session, batch_size=2, max_deletes_per_second=1000)
+    assert (result.orphaned, result.orphaned_bytes, result.deleted, result.failed) == (3, 18, 3, 0)
+    assert not any(path.exists() for path in orphans)
+    assert live_blob.exists() and live_preview.exists() and recent.exists()
+
+
+def test_reconcile_matches_paths_however_the_storage_dir_is_spelled(
+    client: TestClient,
+    db_session: Session,
+    _cert_storage_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    upload = client.post(
+        f"/api/courses/{course_id}/certificates",
+        files={"file": ("cert.pdf", b"%PDF-1.4 live", "application/pdf")},
+        headers=headers,
+    )
+    live_blob = Path(upload.json()["blob_path"])
+    orphan = storage.shard_path(_cert_storage_dir, "ab" * 32)
+    orphan.parent.mkdir(parents=True, exist_ok=True)
+    orphan.write_bytes(b"orphan")
+
+    monkeypatch.chdir(_cert_storage_dir.parent)
+    monkeypatch.setenv("CERT_STORAGE_DIR", _cert_storage_dir.name)
+    result = reconcile_storage(db_session, min_age=timedelta(0))
+
+    assert (result.scanned, result.deleted) == (2, 1)
+    assert live_blob.exists() and not orphan.exists()
+
+
+def test_reconcile_refuses_to_delete_when_no_reference_is_in_storage(
+    client: TestClient,
+    db_session: Session,
+    _cert_storage_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course_id = _create_course(client, headers)
+    client.post(
+        f"/api/courses/{course_id}/certificates",
+        files={"file": ("cert.pdf", b"%PDF-1.4 live", "application/pdf")},
+        headers=headers,
+    )
+    elsewhere = _cert_storage_dir.parent / "elsewhere"
+    stray = storage.shard_path(elsewhere, "cd" * 32)
+    stray.parent.mkdir(parents=True)
+    stray.write_bytes(b"not orphaned, just unknown")
+
+    monkeypatch.setenv("CERT_STORAGE_DIR", str(elsewhere))
+    with pytest.raises(RuntimeError, match="referenced blobs was found"):
+        reconcile_storage(db_session, min_age=timedelta(0))
+    assert stray.exists()
+
+
+def test_reconcile_batches_s3_deletes(
+    client: TestClient, db_session: Session, s3_bucket
+) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    certificate = _create_s3_certificate(client, db_session, s3_bucket, headers, b"kept")
+    for index in range(1005):
+        s3_bucket.put_object(Bucket="certs", Key=f"sha256/{index:064x}", Body=b"x")
+
+    result = reconcile_storage(db_session, min_age=timedelta(0))
+    assert (result.scanned, result.deleted, result.failed) == (1006, 1005, 0)
+    remaining = s3_bucket.list_objects_v2(Bucket="certs")["Contents"]
+    assert [item["Key"] for item in remaining] == [certificate.blob_path]
@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 
 
@@ -89,3 +91,171 @@ def test_delete_course_removes_allocations(client: TestClient) -> None:
 
     get_resp = client.get(f"/api/courses/{course_id}", headers=headers)
     assert get_resp.status_code == 404
+
+
+def test_list_courses_keyset_pagination(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    for day in range(1, 6):
+        resp = client.post(
+            "/api/courses",
+            json={
+                "title": f"Course {day}",
+                "provider": "Provider A",
+                "completed_at": f"2024-03-0{day}",
+                "hours": "1.0",
+            },
+            headers=headers,
+        )
+        assert resp.status_code == 201
+
+    unpaginated = client.get("/api/courses", headers=headers)
+    assert unpaginated.status_code == 200
+    assert "X-Next-Cursor" not in unpaginated.headers
+    expected = [item["id"] for item in unpaginated.json()]
+    assert len(expected) == 5
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        page = client.get("/api/courses", params=params, headers=headers)
+        assert page.status_code == 200
+        assert len(page.json()) <= 2
+        seen.extend(item["id"] for item in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    assert seen == expected
+    assert [item["completed_at"] for item in unpaginated.json()][0] == "2024-03-05"
+
+    bad_cursor = client.get("/api/courses", params={"limit": 2, "cursor": "nope"}, headers=headers)
+    assert bad_cursor.status_code == 400
+
+
+def test_import_courses_from_csv_allocates_and_reports_rows(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+    cycle_id = _create_cycle(client, headers, state_license_id, "2024-01-01", "2024-12-31")
+
+    csv_body = (
+        "title,provider,completed_at,hours,notes\n"
+        "Ethics,Provider A,2024-03-01,2.5,imported\n"
+        "Old course,,2023-06-01,1.0,\n"
+        ",Provider B,2024-04-01,1.0,\n"
+        "Bad hours,Provider C,2024-05-01,0,\n"
+    )
+    resp = client.post(
+        "/api/courses/import",
+        files={"file": ("courses.csv", csv_body.encode(), "text/csv")},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["created_count"] == 2
+    assert body["error_count"] == 2
+    assert body["allocation_count"] == 1
+    assert [row["status"] for row in body["rows"]] == ["created", "created", "error", "error"]
+    assert body["rows"][0]["allocated_cycle_ids"] == [cycle_id]
+    assert body["rows"][1]["allocated_cycle_ids"] == []
+    assert "title" in body["rows"][2]["error"]
+
+    courses = client.get("/api/courses", headers=headers)
+    assert {item["title"] for item in courses.json()} == {"Ethics", "Old course"}
+
+
+def test_import_courses_from_json_array(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    payload = [
+        {"title": "JSON course", "completed_at": "2024-02-01", "hours": "3"},
+        "not an object",
+    ]
+    resp = client.post(
+        "/api/courses/import",
+        files={"file": ("courses.json", json.dumps(payload).encode(), "application/json")},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    assert resp.json()["created_count"] == 1
+    assert resp.json()["rows"][1]["status"] == "error"
+
+    unsupported = client.post(
+        "/api/courses/import",
+        files={"file": ("courses.txt", b"hello", "text/plain")},
+        headers=headers,
+    )
+    assert unsupported.status_code == 415
+
+
+def test_create_update_and_import_share_hours_limits(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    course = {"title": "Ethics", "completed_at": "2024-02-01"}
+    for hours in ("0", "10000"):
+        assert client.post("/api/courses", json={**course, "hours": hours}, headers=headers).status_code == 422
+
+    course_id = client.post("/api/courses", json={**course, "hours": "1"}, headers=headers).json()["id"]
+    for hours in ("-1", "10000"):
+        resp = client.patch(f"/api/courses/{course_id}", json={"hours": hours}, headers=headers)
+        assert resp.status_code == 422
+
+    imported = client.post(
+        "/api/courses/import",
+        files={"file": ("courses.json", json.dumps([{**course, "hours": "10000"}]).encode(), "application/json")},
+        headers=headers,
+    )
+    assert imported.json()["rows"][0]["error"].startswith("hours:")
+
+
+def test_update_course_date_moves_allocations(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+    cycle_2024 = _create_cycle(client, headers, state_license_id, "2024-01-01", "2024-12-31")
+    cycle_2025 = _create_cycle(client, headers, state_license_id, "2025-01-01", "2025-12-31")
+    manual_cycle = _create_cycle(client, headers, state_license_id, "2023-01-01", "2023-12-31")
+
+    create_resp = client.post(
+        "/api/courses",
+        json={"title": "Moving", "completed_at": "2024-06-01", "hours": "2.0"},
+        headers=headers,
+    )
+    assert create_resp.status_code == 201
+    course_id = create_resp.json()["id"]
+    bulk = client.post(
+        "/api/allocations/bulk",
+        json={"course_id": course_id, "cycle_ids": [manual_cycle]},
+        headers=headers,
+    )
+    assert bulk.status_code == 201
+
+    patch = client.patch(
+        f"/api/courses/{course_id}", json={"completed_at": "2025-03-01"}, headers=headers
+    )
+    assert patch.status_code == 200
+
+    allocations = client.get("/api/allocations", params={"course_id": course_id}, headers=headers)
+    assert {item["license_cycle_id"] for item in allocations.json()} == {cycle_2025, manual_cycle}
+    assert cycle_2024 not in {item["license_cycle_id"] for item in allocations.json()}
+
+
+def test_eligible_cycles_cover_completion_date(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+    covering = _create_cycle(client, headers, state_license_id, "2024-01-01", "2024-02-01")
+    _create_cycle(client, headers, state_license_id, "2024-02-02", "2024-12-31")
+
+    create_resp = client.post(
+        "/api/courses",
+        json={"title": "Boundary", "completed_at": "2024-02-01", "hours": "1.0"},
+        headers=headers,
+    )
+    course_id = create_resp.json()["id"]
+
+    resp = client.get(f"/api/courses/{course_id}/eligible-cycles", headers=headers)
+    assert resp.status_code == 200
+    assert [item["id"] for item in resp.json()] == [covering]
+
+    other = client.get(
+        f"/api/courses/{course_id}/eligible-cycles",
+        headers={"X-MS-CLIENT-PRINCIPAL-ID": "user-2"},
+    )
+    assert other.status_code == 404
@@ -1,5 +1,16 @@
+import csv
+import io
+import uuid
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+import pytest
 from fastapi.testclient import TestClient
 
+from ce_api import audit_packet
+from ce_api.audit_packet import AuditPacketRow, iter_audit_packet
+
 
 def _create_state_license(client: TestClient, headers: dict) -> str:
     resp = client.post(
@@ -92,3 +103,170 @@ def test_delete_cycle_removes_allocations(client: TestClient) -> None:
     allocations_after = client.get("/api/allocations", headers=headers)
     assert allocations_after.status_code == 200
     assert all(item["license_cycle_id"] != cycle_id for item in allocations_after.json())
+
+
+def test_list_cycles_keyset_pagination(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+
+    created = []
+    for year in (2026, 2024, 2025):
+        resp = client.post(
+            "/api/cycles",
+            json={
+                "state_license_id": state_license_id,
+                "cycle_start": f"{year}-01-01",
+                "cycle_end": f"{year}-12-31",
+                "required_hours": "10.0",
+            },
+            headers=headers,
+        )
+        assert resp.status_code == 201
+        created.append(resp.json()["id"])
+
+    first = client.get("/api/cycles", params={"limit": 2}, headers=headers)
+    assert first.status_code == 200
+    assert [item["cycle_end"] for item in first.json()] == ["2024-12-31", "2025-12-31"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/api/cycles", params={"limit": 2, "cursor": cursor}, headers=headers)
+    assert second.status_code == 200
+    assert [item["cycle_end"] for item in second.json()] == ["2026-12-31"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_cycle_auto_allocate_backfills_courses(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+    course_id = _create_course(client, headers)
+
+    create_resp = client.post(
+        "/api/cycles",
+        params={"auto_allocate": "true"},
+        json={
+            "state_license_id": state_license_id,
+            "cycle_start": "2024-01-01",
+            "cycle_end": "2024-03-31",
+            "required_hours": "10.0",
+        },
+        headers=headers,
+    )
+    assert create_resp.status_code == 201
+    assert create_resp.json()["auto_allocation"] == {"created": 0, "already_allocated": 0}
+    cycle_id = create_resp.json()["id"]
+
+    update_resp = client.patch(
+        f"/api/cycles/{cycle_id}",
+        params={"auto_allocate": "true"},
+        json={"cycle_end": "2024-12-31"},
+        headers=headers,
+    )
+    assert update_resp.status_code == 200
+    assert update_resp.json()["auto_allocation"] == {"created": 1, "already_allocated": 0}
+
+    allocations = client.get("/api/allocations", params={"cycle_id": cycle_id}, headers=headers)
+    assert [item["course_credit_id"] for item in allocations.json()] == [course_id]
+
+    again = client.patch(
+        f"/api/cycles/{cycle_id}",
+        params={"auto_allocate": "true"},
+        json={"required_hours": "12.0"},
+        headers=headers,
+    )
+    assert again.json()["auto_allocation"] == {"created": 0, "already_allocated": 1}
+
+
+def test_cycle_audit_packet_streams_certificates_and_manifest(client: TestClient) -> None:
+    headers = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+    state_license_id = _create_state_license(client, headers)
+    cycle_resp = client.post(
+        "/api/cycles",
+        json={
+            "state_license_id": state_license_id,
+            "cycle_start": "2024-01-01",
+            "cycle_end": "2024-12-31",
+            "required_hours": "10.0",
+        },
+        headers=headers,
+    )
+    cycle_id = cycle_resp.json()["id"]
+    course_id = _create_course(client, headers)
+    client.post(
+        "/api/courses",
+        json={"title": "No Cert", "completed_at": "2024-06-01", "hours": "1.5"},
+        headers=headers,
+    )
+    for content in (b"first certificate", b"second certificate"):
+        upload = client.post(
+            f"/api/courses/{course_id}/certificates",
+            files={"file": ("cert.pdf", content, "application/pdf")},
+            headers=headers,
+        )
+        assert upload.status_code == 201
+
+    packet = client.get(f"/api/cycles/{cycle_id}/audit-packet", headers=headers)
+    assert packet.status_code == 200
+    assert packet.headers["content-type"] == "application/zip"
+    assert packet.headers["content-disposition"] == (
+        'attachment; filename="audit-WA-2024-01-01-2024-12-31.zip"'
+    )
+
+    archive = zipfile.ZipFile(io.BytesIO(packet.content))
+    assert archive.testzip() is None
+    assert archive.namelist() == [
+        "certificates/2024-05-01_Course_cert.pdf",
+        "certificates/2024-05-01_Course_cert-2.pdf",
+        "manifest.csv",
+    ]
+    assert archive.read("certificates/2024-05-01_Course_cert.pdf") == b"first certificate"
+
+    manifest = list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode())))
+    assert [(row["course_title"], row["hours"], row["status"]) for row in manifest] == [
+        ("Course", "5.00", "included"),
+        ("Course", "", "included"),
+        ("No Cert", "1.50", "no certificate"),
+    ]
+
+    other = client.get(
+        f"/api/cycles/{cycle_id}/audit-packet",
+        headers={"X-MS-CLIENT-PRINCIPAL-ID": "user-2"},
+    )
+    assert other.status_code == 404
+
+
+def test_audit_packet_closes_prefetched_blobs_when_the_download_stops(monkeypatch: pytest.MonkeyPatch) -> None:
+    opened = []
+
+    class _Blob:
+        closed = False
+
+        def __iter__(self):
+            yield b"x" * 1024
+
+        def close(self) -> None:
+            self.closed = True
+
+    def _open_blob(blob_path: str) -> _Blob:
+        opened.append(_Blob())
+        return opened[-1]
+
+    monkeypatch.setattr(audit_packet, "_open_blob", _open_blob)
+    rows = [
+        AuditPacketRow(
+            course_id=uuid.uuid4(),
+            course_title=f"Course {n}",
+            provider=None,
+            completed_at=date(2024, 5, 1),
+            hours=Decimal("1.0"),
+            certificate_filename="cert.pdf",
+            blob_path=f"blob-{n}",
+        )
+        for n in range(6)
+    ]
+
+    packet = iter_audit_packet(rows)
+    next(packet)
+    packet.close()
+
+    assert len(opened) > 1
+    assert all(blob.closed for blob in opened)
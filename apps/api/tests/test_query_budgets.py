@@ -0,0 +1,103 @@
+import json
+from collections.abc import Callable
+
+import pytest
+from fastapi.testclient import TestClient
+
+HEADERS = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+
+# Statements per request, counting the user lookup in get_current_user. A
+# route that starts loading rows one by one blows its budget as soon as the
+# second, larger data set is seeded.
+GET_BUDGETS = {
+    "/api/timeline": 4,
+    "/api/timeline/events": 5,
+    "/api/allocations": 2,
+    "/api/courses": 2,
+    "/api/cycles": 2,
+    "/api/progress": 3,
+    "/api/state-licenses": 2,
+    "/api/courses/{course_id}/certificates": 3,
+}
+
+
+def _seed(client: TestClient, state_code: str, years: range) -> tuple[list[str], list[str]]:
+    resp = client.post(
+        "/api/state-licenses",
+        json={"state_code": state_code, "license_number": "LIC"},
+        headers=HEADERS,
+    )
+    state_license_id = resp.json()["id"]
+    cycle_ids, course_ids = [], []
+    for year in years:
+        resp = client.post(
+            "/api/cycles",
+            json={
+                "state_license_id": state_license_id,
+                "cycle_start": f"{year}-01-01",
+                "cycle_end": f"{year}-12-31",
+                "required_hours": "10.0",
+            },
+            headers=HEADERS,
+        )
+        cycle_ids.append(resp.json()["id"])
+        resp = client.post(
+            "/api/courses",
+            json={"title": f"Course {year}", "provider": "Provider", "completed_at": f"{year}-03-01", "hours": "2.0"},
+            headers=HEADERS,
+        )
+        course_ids.append(resp.json()["id"])
+        client.post(
+            f"/api/courses/{course_ids[-1]}/certificates",
+            files={"file": ("cert.pdf", b"%PDF-1.4 certificate", "application/pdf")},
+            headers=HEADERS,
+        )
+    return cycle_ids, course_ids
+
+
+@pytest.mark.parametrize("state_code, years", [("WA", range(2020, 2021)), ("OR", range(2020, 2026))])
+def test_read_routes_stay_within_query_budget(
+    timed_client: TestClient,
+    query_budget: Callable,
+    state_code: str,
+    years: range,
+) -> None:
+    _, course_ids = _seed(timed_client, state_code, years)
+
+    for route, budget in GET_BUDGETS.items():
+        resp = query_budget("GET", route.format(course_id=course_ids[0]), budget, headers=HEADERS)
+        assert resp.status_code == 200
+
+
+def test_write_routes_stay_within_query_budget(timed_client: TestClient, query_budget: Callable) -> None:
+    cycle_ids, course_ids = _seed(timed_client, "WA", range(2020, 2024))
+
+    resp = query_budget(
+        "POST",
+        "/api/allocations/bulk",
+        2,
+        json={"course_id": course_ids[0], "cycle_ids": cycle_ids},
+        headers=HEADERS,
+    )
+    assert resp.status_code == 201
+    resp = query_budget(
+        "POST",
+        "/api/courses",
+        4,
+        json={"title": "Another", "provider": "Provider", "completed_at": "2021-03-01", "hours": "1.0"},
+        headers=HEADERS,
+    )
+    assert resp.status_code == 201
+
+    # COPY on the raw cursor is counted explicitly; one statement however many rows.
+    courses = [{"title": f"Imported {n}", "completed_at": "2021-03-01", "hours": "1.0"} for n in range(25)]
+    resp = query_budget(
+        "POST",
+        "/api/courses/import",
+        3,
+        files={"file": ("courses.json", json.dumps(courses).encode(), "application/json")},
+        headers=HEADERS,
+    )
+    assert resp.status_code == 201
+    assert resp.json()["created_count"] == 25
+    assert resp.headers["x-db-query-count"] == "3"
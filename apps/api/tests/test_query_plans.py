@@ -0,0 +1,136 @@
+from datetime import date, datetime, timezone
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ce_api.models import Certificate, CourseCredit, CreditAllocation, LicenseCycle, User
+from ce_api.models.license_cycle import cycle_period
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, external_user_id)
+    SELECT gen_random_uuid(), 'plan-user-' || n FROM generate_series(1, 500) AS n
+    """,
+    """
+    INSERT INTO state_licenses (id, user_id, state_code)
+    SELECT gen_random_uuid(), u.id, s.code
+    FROM users u CROSS JOIN (VALUES ('NY'), ('NJ'), ('PA')) AS s(code)
+    """,
+    """
+    INSERT INTO license_cycles (id, user_id, state_license_id, cycle_start, cycle_end, required_hours)
+    SELECT gen_random_uuid(), sl.user_id, sl.id,
+           DATE '2020-01-01' + (n * 730), DATE '2021-12-31' + (n * 730), 36
+    FROM state_licenses sl CROSS JOIN generate_series(0, 2) AS n
+    """,
+    """
+    INSERT INTO course_credits (id, user_id, title, completed_at, hours)
+    SELECT gen_random_uuid(), u.id, 'Course ' || n, DATE '2020-01-01' + (n * 37), 2
+    FROM users u CROSS JOIN generate_series(1, 60) AS n
+    """,
+    """
+    INSERT INTO credit_allocations (id, user_id, course_credit_id, license_cycle_id)
+    SELECT gen_random_uuid(), cc.user_id, cc.id, lc.id
+    FROM course_credits cc
+    JOIN license_cycles lc
+      ON lc.user_id = cc.user_id
+     AND daterange(lc.cycle_start, lc.cycle_end, '[]') @> cc.completed_at
+    """,
+    """
+    INSERT INTO certificates (id, user_id, course_credit_id, filename, blob_path)
+    SELECT gen_random_uuid(), cc.user_id, cc.id, 'cert.pdf', cc.id::text || '.pdf'
+    FROM course_credits cc
+    WHERE cc.title LIKE '%0'
+    """,
+]
+
+HOT_TABLES = {"course_credits", "license_cycles", "credit_allocations", "certificates"}
+
+
+@pytest.fixture()
+def seeded(db_session: Session) -> dict:
+    for statement in SEED_SQL:
+        db_session.execute(sa.text(statement))
+    db_session.commit()
+    db_session.execute(sa.text("ANALYZE"))
+
+    user = db_session.scalar(select(User).where(User.external_user_id == "plan-user-250"))
+    course = db_session.scalar(
+        select(CourseCredit).where(CourseCredit.user_id == user.id).limit(1)
+    )
+    cycle_ids = db_session.scalars(
+        select(LicenseCycle.id).where(LicenseCycle.user_id == user.id)
+    ).all()
+    return {"user_id": user.id, "course_id": course.id, "cycle_ids": cycle_ids}
+
+
+def _hot_queries(seeded: dict) -> dict:
+    user_id = seeded["user_id"]
+    cycle_ids = seeded["cycle_ids"]
+    return {
+        "courses_page": select(CourseCredit)
+        .where(CourseCredit.user_id == user_id)
+        .order_by(CourseCredit.completed_at.desc(), CourseCredit.id.desc())
+        .limit(51),
+        "courses_after_cursor": select(CourseCredit)
+        .where(
+            CourseCredit.user_id == user_id,
+            sa.tuple_(CourseCredit.completed_at, CourseCredit.id)
+            < sa.tuple_(date(2023, 1, 1), seeded["course_id"]),
+        )
+        .order_by(CourseCredit.completed_at.desc(), CourseCredit.id.desc())
+        .limit(51),
+        "cycles_page": select(LicenseCycle)
+        .where(LicenseCycle.user_id == user_id)
+        .order_by(LicenseCycle.cycle_end.asc(), LicenseCycle.id.asc())
+        .limit(51),
+        "eligible_cycles": select(LicenseCycle).where(
+            LicenseCycle.user_id == user_id,
+            cycle_period().op("@>")(date(2022, 6, 1)),
+        ),
+        "allocations_page": select(CreditAllocation)
+        .where(CreditAllocation.user_id == user_id)
+        .order_by(CreditAllocation.created_at.asc(), CreditAllocation.id.asc())
+        .limit(51),
+        "allocations_by_cycle": select(CreditAllocation.id).where(
+            CreditAllocation.license_cycle_id == cycle_ids[0]
+        ),
+        "progress_allocations": select(CreditAllocation.license_cycle_id, CourseCredit.hours)
+        .join(CourseCredit, CreditAllocation.course_credit_id == CourseCredit.id)
+        .where(
+            CreditAllocation.user_id == user_id,
+            CreditAllocation.license_cycle_id.in_(cycle_ids),
+        ),
+        "course_certificates": select(Certificate)
+        .where(Certificate.course_credit_id == seeded["course_id"])
+        .order_by(Certificate.created_at.asc(), Certificate.id.asc()),
+        "user_certificates": select(Certificate).where(
+            Certificate.user_id == user_id,
+            Certificate.created_at <= datetime.now(timezone.utc),
+        ),
+    }
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def test_hot_queries_avoid_sequential_scans(db_session: Session, seeded: dict) -> None:
+    failures = {}
+    for name, stmt in _hot_queries(seeded).items():
+        compiled = stmt.compile(
+            db_session.get_bind(), compile_kwargs={"render_postcompile": True}
+        )
+        explained = db_session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar_one()
+        scans = _seq_scans(explained[0]["Plan"])
+        if scans:
+            failures[name] = scans
+    assert failures == {}
@@ -0,0 +1,80 @@
+import json
+import logging
+import re
+import time
+from pathlib import Path
+
+import fastapi
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from ce_api.request_timing import ServerTimingMiddleware, TimedRoute, current_timings, timed
+
+HEADERS = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+UV_LOCK = Path(__file__).resolve().parents[1] / "uv.lock"
+
+
+def _locked_version(package: str) -> str:
+    return re.search(rf'name = "{package}"\nversion = "([^"]+)"', UV_LOCK.read_text()).group(1)
+
+
+def _phases(header: str) -> dict[str, float]:
+    phases = {}
+    for entry in header.split(","):
+        name, _, duration = entry.strip().partition(";dur=")
+        phases[name] = float(duration)
+    return phases
+
+
+def test_server_timing_header_splits_request_into_phases(
+    timed_client: TestClient, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level(logging.INFO, logger="ce_api.request_timing"):
+        resp = timed_client.get("/api/timeline", headers=HEADERS)
+
+    assert resp.status_code == 200
+    phases = _phases(resp.headers["server-timing"])
+    assert {"auth", "sql", "handler", "serialize", "total"} <= set(phases)
+    assert phases["total"] >= phases["handler"] + phases["serialize"]
+    assert int(resp.headers["x-db-query-count"]) >= 2
+    assert float(resp.headers["x-db-time-ms"]) == phases["sql"]
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "request_timing"
+    assert record["path"] == "/api/timeline"
+    assert record["route"] == "get_timeline"
+    assert record["status"] == 200
+    assert record["sql_ms"] > 0
+    assert record["sql_count"] == int(resp.headers["x-db-query-count"])
+
+
+def test_timing_hooks_do_nothing_without_the_middleware(client: TestClient) -> None:
+    with timed("auth"):
+        assert current_timings() is None
+
+    resp = client.get("/api/timeline", headers=HEADERS)
+    assert resp.status_code == 200
+    assert "server-timing" not in resp.headers
+
+
+def test_nested_routers_charge_a_slow_handler_once() -> None:
+    # How include_router copies routes changes between releases; test the one we ship.
+    assert fastapi.__version__ == _locked_version("fastapi")
+    inner = APIRouter(prefix="/inner", route_class=TimedRoute)
+
+    @inner.get("/slow")
+    def slow() -> dict:
+        time.sleep(0.05)
+        return {}
+
+    outer = APIRouter(prefix="/api", route_class=TimedRoute)
+    outer.include_router(inner)
+    nested_app = FastAPI()
+    nested_app.include_router(outer)
+
+    with TestClient(ServerTimingMiddleware(nested_app)) as test_client:
+        resp = test_client.get("/api/inner/slow")
+
+    phases = _phases(resp.headers["server-timing"])
+    assert 50 <= phases["handler"] <= phases["total"]
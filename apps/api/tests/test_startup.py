@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from alembic import command as alembic_command
+from alembic.config import Config as AlembicConfig
+from alembic.script import ScriptDirectory
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from ce_api import warmup
+from ce_api.db.migrations import SCHEMA_HEAD_REVISION, get_database_revision, migrate_to_head
+from ce_api.main import app
+
+ALEMBIC_INI = str(Path(__file__).resolve().parents[1] / "alembic.ini")
+LAZY_MODULES = {"alembic", "boto3", "botocore", "brotli", "httpx", "jwt", "PIL"}
+IMPORT_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def _wait_for_warmup(client: TestClient) -> httpx.Response:
+    deadline = time.monotonic() + 10
+    while True:
+        resp = client.get("/readyz")
+        if resp.json()["status"] != "warming" or time.monotonic() > deadline:
+            return resp
+        time.sleep(0.05)
+
+
+def _import_times() -> dict[str, int]:
+    """Import ``ce_api.main`` in a fresh interpreter; returns cumulative microseconds per module."""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("CERT_STORAGE_BUCKET", "COGNITO_"))
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ce_api.main"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_skips_heavy_optional_dependencies() -> None:
+    imported = {name.split(".")[0] for name in _import_times()}
+    assert imported & LAZY_MODULES == set()
+
+
+def test_app_import_fits_cold_start_budget() -> None:
+    # Best of three keeps a noisy neighbour from failing the build.
+    best_us = min(_import_times()["ce_api.main"] for _ in range(3))
+    assert best_us / 1000 < IMPORT_BUDGET_MS
+
+
+def test_schema_head_revision_matches_alembic_head() -> None:
+    script = ScriptDirectory.from_config(AlembicConfig(ALEMBIC_INI))
+    assert script.get_heads() == [SCHEMA_HEAD_REVISION]
+
+
+def test_migrate_to_head_runs_once_across_concurrent_instances() -> None:
+    engine = create_engine(os.environ["DATABASE_URL"])
+    try:
+        assert migrate_to_head(engine, ALEMBIC_INI) is False
+
+        # Go back past 0006 so the winner runs CREATE INDEX CONCURRENTLY
+        # while the other instance waits for the lock.
+        alembic_command.downgrade(AlembicConfig(ALEMBIC_INI), "20261019_0005")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(
+                pool.map(
+                    lambda _: migrate_to_head(engine, ALEMBIC_INI, lock_timeout=60, poll_interval=0.05),
+                    range(2),
+                )
+            )
+        assert sorted(results) == [False, True]
+        with engine.connect() as connection:
+            assert get_database_revision(connection) == SCHEMA_HEAD_REVISION
+    finally:
+        engine.dispose()
+
+
+def test_readyz_reports_warmup_steps() -> None:
+    with TestClient(app) as client:
+        assert client.get("/healthz").status_code == 200
+        resp = _wait_for_warmup(client)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "ready"
+    assert [(step["name"], step["status"]) for step in body["steps"]] == [
+        ("db_pool", "ok"),
+        ("jwks", "skipped"),
+        ("hot_queries", "ok"),
+    ]
+
+
+def test_readyz_recovers_once_a_failed_warmup_step_succeeds(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts = []
+
+    def _flaky() -> int:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("keyset unreachable")
+        return 2
+
+    monkeypatch.setattr(warmup, "prefetch_jwks", _flaky)
+    monkeypatch.setattr(warmup, "WARMUP_RETRY_INITIAL_SECONDS", 0.2)
+    with TestClient(app) as client:
+        failed = _wait_for_warmup(client)
+        assert failed.status_code == 503
+        assert failed.json()["status"] == "failed"
+        assert failed.json()["steps"][1]["detail"] == "RuntimeError: keyset unreachable"
+
+        deadline = time.monotonic() + 10
+        while (resp := client.get("/readyz")).status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    assert resp.json()["status"] == "ready"
+    jwks_step = resp.json()["steps"][1]
+    assert (jwks_step["name"], jwks_step["status"], jwks_step["attempts"]) == ("jwks", "ok", 2)
@@ -0,0 +1,75 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ce_api import main
+from ce_api.scripts.precompress_static import precompress_static
+from ce_api.static_files import build_static_manifest
+
+INDEX_HTML = b"<!doctype html><html><body><div id=root></div></body></html>"
+BUNDLE_JS = b"export const answer = 42;\n" * 200
+
+
+@pytest.fixture()
+def static_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    static_dir = tmp_path / "static"
+    (static_dir / "assets").mkdir(parents=True)
+    (static_dir / "index.html").write_bytes(INDEX_HTML)
+    (static_dir / "assets" / "index-3f2a9c.js").write_bytes(BUNDLE_JS)
+    (static_dir / "assets" / "logo-77aa01.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(64))
+    monkeypatch.setattr(main, "STATIC_DIR", static_dir)
+    return static_dir
+
+
+def test_hashed_assets_are_immutable_and_precompressed(static_dir: Path) -> None:
+    with TestClient(main.app) as client:
+        brotli_resp = client.get("/assets/index-3f2a9c.js", headers={"Accept-Encoding": "gzip, br"})
+        gzip_resp = client.get("/assets/index-3f2a9c.js", headers={"Accept-Encoding": "gzip"})
+        plain_resp = client.get("/assets/index-3f2a9c.js", headers={"Accept-Encoding": "identity"})
+        image_resp = client.get("/assets/logo-77aa01.png", headers={"Accept-Encoding": "gzip, br"})
+
+    assert brotli_resp.headers["content-encoding"] == "br"
+    assert brotli_resp.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert brotli_resp.headers["vary"] == "Accept-Encoding"
+    assert brotli_resp.content == BUNDLE_JS
+    assert gzip_resp.headers["content-encoding"] == "gzip"
+    assert gzip_resp.content == BUNDLE_JS
+    assert "content-encoding" not in plain_resp.headers
+    assert plain_resp.content == BUNDLE_JS
+    assert len({brotli_resp.headers["etag"], gzip_resp.headers["etag"], plain_resp.headers["etag"]}) == 3
+    assert brotli_resp.headers["etag"] == plain_resp.headers["etag"][:-1] + '-br"'
+    assert gzip_resp.headers["vary"] == plain_resp.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in image_resp.headers
+    assert image_resp.headers["content-type"] == "image/png"
+
+
+def test_index_html_is_revalidated_and_serves_client_routes(static_dir: Path) -> None:
+    with TestClient(main.app) as client:
+        index = client.get("/")
+        route = client.get("/cycles/123")
+        revalidated = client.get("/", headers={"If-None-Match": index.headers["etag"]})
+        other_encoding = client.get(
+            "/", headers={"If-None-Match": index.headers["etag"], "Accept-Encoding": "identity"}
+        )
+        api_miss = client.get("/api/nope")
+
+    assert index.content == INDEX_HTML
+    assert index.headers["cache-control"] == "no-cache"
+    assert route.content == INDEX_HTML
+    assert route.headers["etag"] == index.headers["etag"]
+    assert revalidated.status_code == 304
+    assert other_encoding.status_code == 200
+    assert api_miss.status_code == 404
+
+
+def test_manifest_prefers_build_time_siblings(static_dir: Path) -> None:
+    bundle = static_dir / "assets" / "index-3f2a9c.js"
+    assert precompress_static(static_dir) == 4
+    sibling = bundle.with_name(bundle.name + ".gz")
+    sibling.write_bytes(gzip.compress(BUNDLE_JS, compresslevel=1))
+
+    manifest = build_static_manifest(static_dir)
+    assert sorted(manifest) == ["assets/index-3f2a9c.js", "assets/logo-77aa01.png", "index.html"]
+    assert manifest["assets/index-3f2a9c.js"].encoded["gzip"] == sibling.read_bytes()
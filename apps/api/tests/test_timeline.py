@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+HEADERS = {"X-MS-CLIENT-PRINCIPAL-ID": "user-1"}
+
+
+def _create_cycle(client: TestClient, state_code: str, start: str, end: str) -> str:
+    resp = client.post(
+        "/api/state-licenses",
+        json={"state_code": state_code, "license_number": "LIC"},
+        headers=HEADERS,
+    )
+    resp = client.post(
+        "/api/cycles",
+        json={
+            "state_license_id": resp.json()["id"],
+            "cycle_start": start,
+            "cycle_end": end,
+            "required_hours": "10.0",
+        },
+        headers=HEADERS,
+    )
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def test_timeline_with_inverted_range_is_empty(client: TestClient) -> None:
+    cycle_id = _create_cycle(client, "WA", "2024-01-01", "2024-12-31")
+
+    in_range = client.get("/api/timeline", params={"from": "2024-01-01", "to": "2025-01-01"}, headers=HEADERS)
+    assert [cycle["id"] for cycle in in_range.json()["states"][0]["cycles"]] == [cycle_id]
+
+    inverted = client.get("/api/timeline", params={"from": "2025-01-01", "to": "2024-01-01"}, headers=HEADERS)
+    assert inverted.status_code == 200
+    assert inverted.json() == {"states": []}
+
+
+def test_state_filtered_events_only_include_that_states_certificates(client: TestClient) -> None:
+    _create_cycle(client, "WA", "2024-01-01", "2024-12-31")
+    _create_cycle(client, "OR", "2023-01-01", "2023-12-31")
+    for title, completed_at in (("Washington course", "2024-03-01"), ("Oregon course", "2023-03-01")):
+        course = client.post(
+            "/api/courses",
+            json={"title": title, "completed_at": completed_at, "hours": "2.0"},
+            headers=HEADERS,
+        )
+        client.post(
+            f"/api/courses/{course.json()['id']}/certificates",
+            files={"file": (f"{title}.pdf", title.encode(), "application/pdf")},
+            headers=HEADERS,
+        )
+
+    def _uploads(params: dict) -> list[str]:
+        events = client.get("/api/timeline/events", params=params, headers=HEADERS).json()
+        return sorted(event["subtitle"] for event in events if event["kind"] == "certificate_uploaded")
+
+    assert _uploads({}) == ["Oregon course", "Washington course"]
+    assert _uploads({"state": "wa"}) == ["Washington course"]
@@ -55,10 +55,16 @@ export default function CertificatePreview({
         if (token) {
           headers.set("Authorization", `Bearer ${token}`);
         }
-        const response = await fetch(`/api/certificates/${certificateId}/download`, {
+        let response = await fetch(`/api/certificates/${certificateId}/preview`, {
           headers,
           signal: controller.signal,
         });
+        if (response.status === 415) {
+          response = await fetch(`/api/certificates/${certificateId}/download`, {
+            headers,
+            signal: controller.signal,
+          });
+        }
         if (!response.ok) {
           throw new Error("Certificate preview fetch failed");
         }
@@ -269,6 +269,19 @@ new aws.s3.BucketOwnershipControls("certificateBucketOwnershipControls", {
   },
 });
 
+new aws.s3.BucketCorsConfiguration("certificateBucketCors", {
+  bucket: certificateBucket.id,
+  corsRules: [
+    {
+      allowedOrigins: [`https://${domainName}`],
+      allowedMethods: ["GET", "HEAD", "POST"],
+      allowedHeaders: ["*"],
+      exposeHeaders: ["ETag"],
+      maxAgeSeconds: 3600,
+    },
+  ],
+});
+
 const apiRepository = new aws.ecr.Repository("apiRepository", {
   name: `${namePrefix}-ceuplanner-api`,
   imageTagMutability: "MUTABLE",
@@ -455,7 +468,7 @@ if (deployApiService) {
     },
     healthCheckConfiguration: {
       protocol: "HTTP",
-      path: "/healthz",
+      path: "/readyz",
       interval: 10,
       timeout: 5,
       healthyThreshold: 1,